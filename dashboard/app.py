@@ -97,6 +97,13 @@ with tab2:
     else:
         st.warning("No market data found in DB. Is the Data Pipeline running?")
 
+    st.subheader("Birdeye Trending (cached)")
+    trending_df = svc.get_trending_tokens()
+    if not trending_df.empty:
+        st.dataframe(trending_df, use_container_width=True, hide_index=True)
+    else:
+        st.caption("Trending list unavailable. Check BIRDEYE_API_KEY.")
+
 with tab3:
     st.subheader("System Logs (Tail 20)")
     logs = svc.get_recent_logs(20)
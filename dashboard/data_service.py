@@ -1,11 +1,17 @@
+import asyncio
 import json
 import os
+import sys
 import pandas as pd
 import sqlalchemy
 from dotenv import load_dotenv
 from solders.pubkey import Pubkey
 from solana.rpc.api import Client
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_pipeline.providers.birdeye import BirdeyeProvider
+from execution.mint_cache import MintCache
+
 load_dotenv()
 
 class DashboardService:
@@ -18,6 +24,7 @@ class DashboardService:
         rpc_url = os.getenv("QUICKNODE_RPC_URL", "https://api.mainnet-beta.solana.com")
         self.rpc = Client(rpc_url)
         self.wallet_addr = self._get_wallet_address()
+        self.birdeye = BirdeyeProvider()
 
     def _get_wallet_address(self):
         try:
@@ -48,6 +55,8 @@ class DashboardService:
                 # 计算当前预估 PnL
                 if 'highest_price' in df.columns and 'entry_price' in df.columns:
                     df['pnl_pct'] = (df['highest_price'] - df['entry_price']) / df['entry_price']
+                # 精度取自交易进程写下的 mint 缓存，不发 RPC
+                df['decimals'] = df['token_address'].map(MintCache.read_store())
                 return df
         except FileNotFoundError:
             return pd.DataFrame()
@@ -73,6 +82,18 @@ class DashboardService:
         except:
             return pd.DataFrame()
     
+    def get_trending_tokens(self, limit=50):
+        # 复用 data_pipeline 的共享 HTTP client，榜单走 TTL 缓存，刷新页面不会重复请求
+        async def _fetch():
+            try:
+                return await self.birdeye.get_trending_tokens(limit=limit)
+            finally:
+                await self.birdeye.http.close()
+        try:
+            return pd.DataFrame(asyncio.run(_fetch()))
+        except Exception:
+            return pd.DataFrame()
+
     def get_recent_logs(self, n=50):
         log_file = "strategy.log"
         if not os.path.exists(log_file): return []
@@ -17,6 +17,29 @@ class Config:
     MAX_FDV = float('inf') 
     BIRDEYE_API_KEY = os.getenv("BIRDEYE_API_KEY", "")
     BIRDEYE_IS_PAID = True
+    BIRDEYE_RPS = 15.0 if BIRDEYE_IS_PAID else 1.0 # 套餐限速 (requests/s)
+    BIRDEYE_BURST = 15
+    BIRDEYE_MAX_RETRIES = 5
+    BIRDEYE_BACKOFF_BASE = 0.5
+    BIRDEYE_BACKOFF_CAP = 30.0
     USE_DEXSCREENER = False
+    ENRICH_LIQUIDITY = True # 用 DexScreener 快照回填 K 线的 liquidity / fdv
+    DEXSCREENER_CONCURRENCY = 5
+    DEXSCREENER_RPS = 5.0 # 官方限额 300 req/min
+    ENRICH_UPDATE_BATCH = 500
+    ENRICH_WINDOW_MINUTES = 15 # 快照只写入其时间点前一个 TIMEFRAME 周期加这段余量（API 延迟）内的 K 线，避免未来数据泄漏到历史 K 线
     CONCURRENCY = 20
-    HISTORY_DAYS = 7
\ No newline at end of file
+    HISTORY_DAYS = 7
+    HTTP_POOL_LIMIT = 100
+    HTTP_POOL_LIMIT_PER_HOST = 30
+    HTTP_DNS_TTL = 300
+    HTTP_KEEPALIVE = 30
+    HTTP_TIMEOUT = 30
+    TRENDING_CACHE_TTL = 300 # 热门榜单变化慢，5 分钟内复用
+    TOKEN_META_CACHE_TTL = 600
+    INCREMENTAL_SYNC = True # 已入库的 token 只拉取最新 K 线
+    INGEST_WRITERS = 2
+    INGEST_FLUSH_ROWS = 50000
+    INGEST_FLUSH_SECONDS = 2.0
+    INGEST_QUEUE_SIZE = 40
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108")) # Prometheus /metrics, 0 关闭
\ No newline at end of file
@@ -1,41 +1,72 @@
 import asyncio
-import aiohttp
+from datetime import datetime, timedelta
 from loguru import logger
 from .config import Config
 from .db_manager import DBManager
+from .ingest import IngestPipeline
+from .metrics import REGISTRY, MetricsServer, DISCOVERY_SECONDS, CANDIDATES
 from .providers.birdeye import BirdeyeProvider
 from .providers.dexscreener import DexScreenerProvider
+from .providers.http_client import get_http_client
+
+# Birdeye 的 '1M' 是月线，不在支持范围内
+_TIMEFRAME_UNITS = {'m': 1, 'min': 1, 'H': 60, 'h': 60, 'D': 1440, 'd': 1440, 'W': 10080, 'w': 10080}
+
+
+def timeframe_minutes(timeframe):
+    """Candle interval in minutes for a Birdeye type such as '1m', '15min', '1H', '1D'."""
+    n = len(timeframe.rstrip('mMinHhDdWw'))
+    unit = timeframe[n:]
+    if not n or unit not in _TIMEFRAME_UNITS:
+        raise ValueError(f"Unsupported TIMEFRAME {timeframe!r}")
+    return int(timeframe[:n]) * _TIMEFRAME_UNITS[unit]
 
 class DataManager:
     def __init__(self):
         self.db = DBManager()
         self.birdeye = BirdeyeProvider()
         self.dexscreener = DexScreenerProvider()
+        self.metrics_server = None
         
     async def initialize(self):
         await self.db.connect()
         await self.db.init_schema()
+        if Config.METRICS_PORT and self.metrics_server is None:
+            try:
+                self.metrics_server = MetricsServer(Config.METRICS_PORT)
+                await self.metrics_server.start()
+            except OSError as e:
+                logger.warning(f"Metrics server not started: {e}")
+                self.metrics_server = None
 
     async def close(self):
         await self.db.close()
+        await get_http_client().close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+            self.metrics_server = None
 
-    async def pipeline_sync_daily(self):
+    async def pipeline_sync_daily(self, incremental=Config.INCREMENTAL_SYNC):
+        run_start = REGISTRY.snapshot()
         logger.info("Step 1: Discovering trending tokens...")
-        limit = 500 if Config.BIRDEYE_IS_PAID else 100
-        candidates = await self.birdeye.get_trending_tokens(limit=limit)
-        
-        logger.info(f"Raw candidates found: {len(candidates)}")
-
-        selected_tokens = []
-        for t in candidates:
-            liq = t.get('liquidity', 0)
-            fdv = t.get('fdv', 0)
+        with DISCOVERY_SECONDS.time():
+            limit = 500 if Config.BIRDEYE_IS_PAID else 100
+            candidates = await self.birdeye.get_trending_tokens(limit=limit)
             
-            if liq < Config.MIN_LIQUIDITY_USD: continue
-            if fdv < Config.MIN_FDV: continue
-            if fdv > Config.MAX_FDV: continue # 剔除像 WIF/BONK 这种巨无霸，专注于早期高成长
-            
-            selected_tokens.append(t)
+            logger.info(f"Raw candidates found: {len(candidates)}")
+
+            selected_tokens = []
+            for t in candidates:
+                liq = t.get('liquidity', 0)
+                fdv = t.get('fdv', 0)
+                
+                if liq < Config.MIN_LIQUIDITY_USD: continue
+                if fdv < Config.MIN_FDV: continue
+                if fdv > Config.MAX_FDV: continue # 剔除像 WIF/BONK 这种巨无霸，专注于早期高成长
+                
+                selected_tokens.append(t)
+        CANDIDATES.inc(len(selected_tokens), outcome='selected')
+        CANDIDATES.inc(len(candidates) - len(selected_tokens), outcome='filtered')
             
         logger.info(f"Tokens selected after filtering: {len(selected_tokens)}")
         
@@ -46,25 +77,70 @@ class DataManager:
         db_tokens = [(t['address'], t['symbol'], t['name'], t['decimals'], Config.CHAIN) for t in selected_tokens]
         await self.db.upsert_tokens(db_tokens)
 
+        addresses = [t['address'] for t in selected_tokens]
+        since = {}
+        if incremental:
+            last_times = await self.db.get_last_times(addresses)
+            # +1s: 跳过已入库的最后一根 K 线，避免 COPY 主键冲突
+            since = {a: int(ts.timestamp()) + 1 for a, ts in last_times.items() if ts}
+            logger.info(f"Incremental sync: {len(since)} tokens resume from last candle, "
+                        f"{len(addresses) - len(since)} need full backfill")
+
         logger.info(f"Step 4: Fetching OHLCV for {len(selected_tokens)} tokens...")
         
-        async with aiohttp.ClientSession(headers=self.birdeye.headers) as session:
-            tasks = []
-            for t in selected_tokens:
-                tasks.append(self.birdeye.get_token_history(session, t['address']))
-            
-            batch_size = 20
-            total_candles = 0
-            
-            for i in range(0, len(tasks), batch_size):
-                batch = tasks[i:i+batch_size]
-                results = await asyncio.gather(*batch)
-                
-                records = [item for sublist in results if sublist for item in sublist]
-                
-                # 批量写入
-                await self.db.batch_insert_ohlcv(records)
-                total_candles += len(records)
-                logger.info(f"Processed batch {i}/{len(tasks)}. Inserted {len(records)} candles.")
-                
-        logger.success(f"Pipeline complete. Total candles stored: {total_candles}")
\ No newline at end of file
+        pipeline = IngestPipeline(
+            fetch=lambda addr: self.birdeye.get_token_history(addr, time_from=since.get(addr)),
+            write=self.db.copy_candle_batches,
+            concurrency=Config.CONCURRENCY,
+            writers=Config.INGEST_WRITERS,
+            flush_rows=Config.INGEST_FLUSH_ROWS,
+            flush_interval=Config.INGEST_FLUSH_SECONDS,
+            queue_size=Config.INGEST_QUEUE_SIZE
+        )
+        # 流动性快照与 K 线抓取并行，K 线写完后再统一回填
+        enrich_task = None
+        snapshot_at = datetime.now()
+        if Config.ENRICH_LIQUIDITY:
+            enrich_task = asyncio.create_task(self.dexscreener.get_token_details_batch(addresses))
+        try:
+            stats = await pipeline.run(addresses)
+        except BaseException:
+            if enrich_task:
+                enrich_task.cancel()
+                await asyncio.gather(enrich_task, return_exceptions=True)
+            raise
+
+        if enrich_task:
+            await self.enrich_liquidity(selected_tokens, await enrich_task, snapshot_at)
+
+        fetch, write = stats['fetch'], stats['write']
+        logger.info(f"Fetch stage: {fetch['items']} tokens, {fetch['rows']} candles, "
+                    f"{fetch['rows_per_s']} candles/s")
+        logger.info(f"Write stage: {write['items']} flushes, {write['rows']} rows, "
+                    f"{write['rows_per_s']} rows/s, busy {write['busy_s']}s")
+        logger.success(f"Pipeline complete. Total candles stored: {write['rows']}")
+        logger.info("Run metrics:")
+        REGISTRY.log_summary(since=run_start)
+        return stats
+
+    async def enrich_liquidity(self, selected_tokens, details, snapshot_at=None):
+        """
+        Join liquidity/fdv snapshots onto the stored candles in bulk.
+        DexScreener details win; Birdeye trending values cover tokens it missed.
+        Only candles that opened within one TIMEFRAME interval plus
+        ENRICH_WINDOW_MINUTES before `snapshot_at` (when the snapshot was
+        requested) are filled, i.e. the latest candle(s); older ones keep liquidity = 0.
+        """
+        snapshot = {t['address']: (t.get('liquidity') or 0.0, t.get('fdv') or 0.0) for t in selected_tokens}
+        for d in details:
+            if d['address'] in snapshot and d['liquidity'] > 0:
+                snapshot[d['address']] = (d['liquidity'], d['fdv'])
+
+        rows = [(a, float(liq), float(fdv)) for a, (liq, fdv) in snapshot.items() if liq > 0]
+        window = timeframe_minutes(Config.TIMEFRAME) + Config.ENRICH_WINDOW_MINUTES
+        since = (snapshot_at or datetime.now()) - timedelta(minutes=window)
+        updated = 0
+        for i in range(0, len(rows), Config.ENRICH_UPDATE_BATCH):
+            updated += await self.db.update_liquidity_snapshot(rows[i:i+Config.ENRICH_UPDATE_BATCH], since)
+        logger.info(f"Liquidity enrichment: {len(details)} DexScreener snapshots, "
+                    f"{len(rows)} tokens, {updated} candles updated")
@@ -1,6 +1,9 @@
+import io
 import asyncpg
 from loguru import logger
 from .config import Config
+from .metrics import DB_WRITE_SECONDS, DB_ROWS
+from .providers.decode import OHLCV_COLUMNS, encode_copy_binary
 
 class DBManager:
     def __init__(self):
@@ -51,6 +54,8 @@ class DBManager:
                 logger.warning("TimescaleDB extension not found, using standard Postgres.")
 
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_ohlcv_address ON ohlcv (address);")
+            # 增量同步按 address 取 MAX(time)
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_ohlcv_address_time ON ohlcv (address, time DESC);")
 
     async def upsert_tokens(self, tokens):
         if not tokens: return
@@ -63,6 +68,39 @@ class DBManager:
                 SET symbol = EXCLUDED.symbol, last_updated = NOW();
             """, tokens)
 
+    async def get_last_times(self, addresses):
+        """{address: latest stored candle time} for the given addresses, in one query."""
+        if not addresses: return {}
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT address, MAX(time) AS last_time
+                FROM ohlcv
+                WHERE address = ANY($1::text[])
+                GROUP BY address;
+            """, list(addresses))
+        return {r['address']: r['last_time'] for r in rows}
+
+    async def update_liquidity_snapshot(self, snapshots, since):
+        """
+        Fill liquidity/fdv on not-yet-enriched candles (liquidity = 0) from `since`
+        on. Pass a `since` just before the snapshot was taken: a snapshot written to
+        older candles would leak later state into history.
+        snapshots: list of (address, liquidity, fdv); one UPDATE ... FROM unnest per call.
+        """
+        if not snapshots: return 0
+        addrs, liqs, fdvs = (list(col) for col in zip(*snapshots))
+        async with self.pool.acquire() as conn:
+            with DB_WRITE_SECONDS.time(op='enrich'):
+                status = await conn.execute("""
+                    UPDATE ohlcv AS o
+                    SET liquidity = s.liquidity, fdv = s.fdv
+                    FROM unnest($1::text[], $2::float8[], $3::float8[]) AS s(address, liquidity, fdv)
+                    WHERE o.address = s.address
+                      AND o.time >= $4
+                      AND o.liquidity = 0;
+                """, addrs, liqs, fdvs, since)
+        return int(status.split()[-1])
+
     async def batch_insert_ohlcv(self, records):
         if not records: return
         async with self.pool.acquire() as conn:
@@ -77,4 +115,27 @@ class DBManager:
             except asyncpg.UniqueViolationError:
                 pass # 忽略重复
             except Exception as e:
-                logger.error(f"Batch insert error: {e}")
\ No newline at end of file
+                logger.error(f"Batch insert error: {e}")
+
+    async def copy_candle_batches(self, batches):
+        """Write columnar CandleBatches via binary COPY, without building row tuples."""
+        batches = [b for b in batches if len(b)]
+        if not batches: return
+        rows = sum(len(b) for b in batches)
+        try:
+            payload = encode_copy_binary(batches)
+            async with self.pool.acquire() as conn:
+                with DB_WRITE_SECONDS.time(op='copy'):
+                    await conn.copy_to_table(
+                        'ohlcv',
+                        source=io.BytesIO(payload),
+                        columns=OHLCV_COLUMNS,
+                        format='binary',
+                        timeout=60
+                    )
+            DB_ROWS.inc(rows, outcome='inserted')
+        except asyncpg.UniqueViolationError:
+            DB_ROWS.inc(rows, outcome='duplicate') # 忽略重复
+        except Exception as e:
+            DB_ROWS.inc(rows, outcome='error')
+            logger.error(f"Batch copy error: {e}")
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from loguru import logger
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    rows: int = 0
+    busy: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    def record(self, rows, seconds, items=1):
+        self.items += items
+        self.rows += rows
+        self.busy += seconds
+
+    def summary(self):
+        wall = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            'items': self.items,
+            'rows': self.rows,
+            'busy_s': round(self.busy, 3),
+            'wall_s': round(wall, 3),
+            'rows_per_s': round(self.rows / wall, 1),
+        }
+
+
+_DONE = object()
+
+
+class IngestPipeline:
+    """
+    Bounded producer/consumer pipeline: fetch -> write.
+
+    `concurrency` fetcher tasks pull addresses and push per-token payloads
+    (row lists or CandleBatches) into a bounded queue; `writers` tasks drain
+    it and flush to the DB once `flush_rows` rows are buffered or the oldest
+    buffered row is older than `flush_interval` seconds. A full queue blocks fetchers (backpressure), so
+    memory stays around `queue_size` token payloads plus the writer buffers.
+
+    Args:
+        fetch: async callable(address) -> sized payload (len() == rows)
+        write: async callable(list of payloads) -> None
+    """
+    def __init__(self, fetch, write, concurrency, writers=1, flush_rows=50000,
+                 flush_interval=2.0, queue_size=None):
+        self.fetch = fetch
+        self.write = write
+        self.concurrency = max(1, concurrency)
+        self.writers = max(1, writers)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size or self.concurrency * 2
+        self.stats = {}
+
+    async def run(self, addresses):
+        self.stats = {'fetch': StageStats('fetch'), 'write': StageStats('write')}
+        addr_q = asyncio.Queue()
+        rec_q = asyncio.Queue(maxsize=self.queue_size)
+        for a in addresses:
+            addr_q.put_nowait(a)
+
+        fetchers = [asyncio.create_task(self._fetch_worker(addr_q, rec_q))
+                    for _ in range(self.concurrency)]
+        writers = [asyncio.create_task(self._write_worker(rec_q))
+                   for _ in range(self.writers)]
+        closer = asyncio.create_task(self._close_when_fetched(fetchers, writers, rec_q))
+        pending = set(fetchers + writers + [closer])
+        try:
+            # 任一任务失败立即停止：写入端挂掉后无人消费有界队列，抓取端会永远阻塞在 put
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                for t in done:
+                    if t.cancelled():
+                        raise RuntimeError("Ingest stage task was cancelled")
+                    if t.exception() is not None:
+                        raise t.exception()
+        finally:
+            # 任意阶段出错或被取消时，收尾所有任务，避免悬挂的 HTTP/DB 调用
+            pending = [t for t in fetchers + writers + [closer] if not t.done()]
+            for t in pending:
+                t.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return {name: s.summary() for name, s in self.stats.items()}
+
+    async def _close_when_fetched(self, fetchers, writers, rec_q):
+        # 被取消的抓取任务不会触发 FIRST_EXCEPTION，这里转成普通异常
+        for res in await asyncio.gather(*fetchers, return_exceptions=True):
+            if isinstance(res, BaseException):
+                raise RuntimeError("Fetch stage task failed") from res
+        for _ in writers:
+            await rec_q.put(_DONE)
+
+    async def _fetch_worker(self, addr_q, rec_q):
+        stats = self.stats['fetch']
+        while True:
+            try:
+                address = addr_q.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            try:
+                records = await self.fetch(address)
+            except Exception as e:
+                logger.error(f"Fetch stage error {address}: {e}")
+                records = None
+            stats.record(len(records) if records else 0, time.perf_counter() - t0)
+            if records:
+                await rec_q.put(records)
+
+    async def _write_worker(self, rec_q):
+        buffer = []
+        buffered_rows = 0
+        first_at = None
+        done = False
+        while not done:
+            timeout = None
+            if buffer:
+                timeout = max(0.0, self.flush_interval - (time.perf_counter() - first_at))
+            # 不用 wait_for：3.11 下取消与 get 同时完成时 wait_for 会吞掉取消，写入端永远挂起
+            getter = asyncio.ensure_future(rec_q.get())
+            try:
+                await asyncio.wait({getter}, timeout=timeout)
+            finally:
+                if not getter.done():
+                    getter.cancel()
+            item = getter.result() if getter.done() and not getter.cancelled() else None
+
+            if item is _DONE:
+                done = True
+            elif item is not None:
+                if not buffer:
+                    first_at = time.perf_counter()
+                buffer.append(item)
+                buffered_rows += len(item)
+
+            expired = buffer and time.perf_counter() - first_at >= self.flush_interval
+            if buffer and (done or expired or buffered_rows >= self.flush_rows):
+                await self._flush(buffer, buffered_rows)
+                buffer = []
+                buffered_rows = 0
+
+    async def _flush(self, payloads, rows):
+        t0 = time.perf_counter()
+        await self.write(payloads)
+        self.stats['write'].record(rows, time.perf_counter() - t0)
@@ -0,0 +1,174 @@
+"""
+Minimal in-process metrics for the ingestion pipeline.
+
+Counters and histograms live in one process-wide REGISTRY, are exposed in
+Prometheus text format by MetricsServer (`GET /metrics`), and can be diffed
+between two snapshots to summarise a single sync run.
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from aiohttp import web
+from loguru import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, value=1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self):
+        for key, v in self.values.items():
+            yield f"{self.name}{_fmt_labels(key)} {v}"
+
+    def snapshot(self):
+        return {key: (v, v) for key, v in self.values.items()}
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}  # key -> [bucket counts..., count, sum]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = [0] * len(self.buckets) + [0, 0.0]
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            s[i] += 1
+        s[-2] += 1
+        s[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def samples(self):
+        for key, s in self.series.items():
+            cum = 0
+            for b, c in zip(self.buckets, s):
+                cum += c
+                yield f"{self.name}_bucket{_fmt_labels(key, [('le', b)])} {cum}"
+            yield f"{self.name}_bucket{_fmt_labels(key, [('le', '+Inf')])} {s[-2]}"
+            yield f"{self.name}_count{_fmt_labels(key)} {s[-2]}"
+            yield f"{self.name}_sum{_fmt_labels(key)} {s[-1]}"
+
+    def snapshot(self):
+        return {key: (s[-2], s[-1]) for key, s in self.series.items()}
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _get(self, cls, name, help_text, **kwargs):
+        m = self.metrics.get(name)
+        if m is None:
+            m = self.metrics[name] = cls(name, help_text, **kwargs)
+        return m
+
+    def counter(self, name, help_text=''):
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for m in self.metrics.values():
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        return {name: m.snapshot() for name, m in self.metrics.items()}
+
+    def summary(self, since=None):
+        """Per-series (count, total) accumulated since an earlier snapshot()."""
+        since = since or {}
+        out = {}
+        for name, snap in self.snapshot().items():
+            prev = since.get(name, {})
+            for key, (count, total) in snap.items():
+                c0, t0 = prev.get(key, (0, 0))
+                if count - c0:
+                    out[f"{name}{_fmt_labels(key)}"] = (count - c0, total - t0)
+        return out
+
+    def log_summary(self, since=None):
+        for series, (count, total) in sorted(self.summary(since).items()):
+            if self.metrics[series.split('{')[0]].kind == 'histogram':
+                logger.info(f"  {series}: n={count} total={total:.3f}s avg={total / count * 1000:.1f}ms")
+            else:
+                logger.info(f"  {series}: {total:g}")
+
+
+REGISTRY = Registry()
+
+# 管线各阶段的指标
+DISCOVERY_SECONDS = REGISTRY.histogram('pipeline_discovery_seconds', 'Candidate discovery and filtering time')
+CANDIDATES = REGISTRY.counter('pipeline_candidates_total', 'Trending candidates by outcome')
+HTTP_SECONDS = REGISTRY.histogram('http_request_seconds', 'Upstream HTTP request latency')
+HTTP_REQUESTS = REGISTRY.counter('http_requests_total', 'Upstream HTTP requests by status')
+RATELIMIT_WAIT = REGISTRY.histogram('ratelimit_wait_seconds', 'Time spent waiting for a rate-limit token')
+RATELIMIT_THROTTLED = REGISTRY.counter('ratelimit_throttled_total', '429 responses received')
+DECODE_SECONDS = REGISTRY.histogram('decode_seconds', 'Candle payload decode time',
+                                    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+DB_WRITE_SECONDS = REGISTRY.histogram('db_write_seconds', 'Postgres write latency')
+DB_ROWS = REGISTRY.counter('db_rows_total', 'OHLCV rows by write outcome')
+
+
+class MetricsServer:
+    """Serve REGISTRY in Prometheus text format on http://host:port/metrics."""
+    def __init__(self, port, host='127.0.0.1', registry=REGISTRY):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics exposed on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -1,42 +1,113 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from loguru import logger
 
+_ROLLING_CHUNK = 1 << 18
+
+
+def _segment_starts(df):
+    codes = pd.factorize(df['address'])[0]
+    is_start = np.ones(len(codes), dtype=bool)
+    is_start[1:] = codes[1:] != codes[:-1]
+    return codes, is_start
+
+
+def _sort_segments(df):
+    """
+    Make each token a contiguous, time-ordered segment (sorting only if needed);
+    return the frame, segment-start mask and each row's position within its token.
+    """
+    df = df.reset_index(drop=True)
+    codes, is_start = _segment_starts(df)
+    t = df['time'].to_numpy()
+    ordered = (np.all(np.diff(codes) >= 0) and
+               np.all((t[1:] >= t[:-1]) | is_start[1:]))
+    if not ordered:
+        df = df.sort_values(['address', 'time'], kind='mergesort').reset_index(drop=True)
+        codes, is_start = _segment_starts(df)
+    seg_first = np.flatnonzero(is_start)[np.cumsum(is_start) - 1]
+    return df, is_start, np.arange(len(codes)) - seg_first
+
+
+def _segmented_ffill(values, is_start):
+    # 每个 token 段内前向填充: 有效值或段首位置取自身下标，其余沿用前一个下标
+    idx = np.where(~np.isnan(values) | is_start, np.arange(len(values)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return values[idx]
+
+
+def _segmented_shift(values, is_start):
+    out = np.empty_like(values)
+    out[0] = np.nan
+    out[1:] = values[:-1]
+    out[is_start] = np.nan
+    return out
+
+
+def _segmented_rolling(values, window, seg_pos, stat):
+    """
+    Rolling mean/std (ddof=1) within each token segment, min_periods=window,
+    matching `groupby('address').rolling(window)`. Windows are strided views
+    over the flat array; any window that would reach into the previous token
+    is masked to NaN.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    windows = sliding_window_view(values, window)  # windows[j] ends at row j + window - 1
+    for lo in range(0, len(windows), _ROLLING_CHUNK):
+        chunk = windows[lo:lo + _ROLLING_CHUNK]
+        res = chunk.mean(axis=1) if stat == 'mean' else chunk.std(axis=1, ddof=1)
+        out[lo + window - 1:lo + window - 1 + len(res)] = res
+    out[seg_pos < window - 1] = np.nan
+    return out
+
+
 class DataProcessor:
     @staticmethod
     def clean_ohlcv(df):
         if df.empty: return df
 
         df = df.drop_duplicates(subset=['time', 'address'], keep='last')
-        
-        df = df.sort_values('time')
-        df['close'] = df['close'].ffill()
+
+        df, is_start, _ = _sort_segments(df)
+        close = _segmented_ffill(df['close'].to_numpy(dtype=np.float64), is_start)
+        df['close'] = close
         df['open'] = df['open'].fillna(df['close'])
         df['high'] = df['high'].fillna(df['close'])
         df['low'] = df['low'].fillna(df['close'])
         df['volume'] = df['volume'].fillna(0)
-        
-        df = df[df['close'] > 1e-15]
-        
+
+        df = df[close > 1e-15].reset_index(drop=True)
+
         return df
 
     @staticmethod
     def add_basic_factors(df):
-        # Log Returns
-        df['log_ret'] = np.log(df['close'] / df['close'].shift(1))
-        
-        # Realized Volatility
-        df['volatility'] = df['log_ret'].rolling(window=20).std()
-        
-        # Volume Shock
-        vol_ma = df['volume'].rolling(window=20).mean() + 1e-6
-        df['vol_shock'] = df['volume'] / vol_ma
-        
-        # Price Trend
-        ma_long = df['close'].rolling(window=60).mean()
-        df['trend'] = np.where(df['close'] > ma_long, 1, -1)
-        
+        if df.empty: return df
+        df, is_start, seg_pos = _sort_segments(df)
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Log Returns
+            log_ret = np.log(close / _segmented_shift(close, is_start))
+            df['log_ret'] = log_ret
+
+            # Realized Volatility
+            df['volatility'] = _segmented_rolling(log_ret, 20, seg_pos, 'std')
+
+            # Volume Shock
+            vol_ma = _segmented_rolling(volume, 20, seg_pos, 'mean') + 1e-6
+            df['vol_shock'] = volume / vol_ma
+
+            # Price Trend
+            ma_long = _segmented_rolling(close, 60, seg_pos, 'mean')
+            df['trend'] = np.where(close > ma_long, 1, -1)
+
         # Robust Normalization
         df = df.replace([np.inf, -np.inf], np.nan).fillna(0)
-        
-        return df
\ No newline at end of file
+
+        return df
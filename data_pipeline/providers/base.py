@@ -6,5 +6,5 @@ class DataProvider(ABC):
         pass
 
     @abstractmethod
-    async def get_token_history(self, session, address: str, days: int):
+    async def get_token_history(self, address: str, days: int, time_from: int = None):
         pass
\ No newline at end of file
@@ -1,9 +1,12 @@
-import aiohttp
 import asyncio
 from datetime import datetime, timedelta
 from loguru import logger
 from ..config import Config
 from .base import DataProvider
+from .decode import decode_ohlcv_items
+from ..metrics import DECODE_SECONDS
+from .http_client import get_http_client
+from .rate_limit import get_limiter, parse_retry_after
 
 class BirdeyeProvider(DataProvider):
     def __init__(self):
@@ -12,8 +15,17 @@ class BirdeyeProvider(DataProvider):
             "X-API-KEY": Config.BIRDEYE_API_KEY,
             "accept": "application/json"
         }
+        self.http = get_http_client()
         self.semaphore = asyncio.Semaphore(Config.CONCURRENCY)
-        
+        self.limiter = get_limiter(
+            'birdeye',
+            max_rate=Config.BIRDEYE_RPS,
+            burst=Config.BIRDEYE_BURST,
+            max_retries=Config.BIRDEYE_MAX_RETRIES,
+            backoff_base=Config.BIRDEYE_BACKOFF_BASE,
+            backoff_cap=Config.BIRDEYE_BACKOFF_CAP
+        )
+
     async def get_trending_tokens(self, limit=100):
         url = f"{self.base_url}/defi/token_trending"
         params = {
@@ -22,73 +34,77 @@ class BirdeyeProvider(DataProvider):
             "offset": "0",
             "limit": str(limit)
         }
-        
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            try:
-                async with session.get(url, params=params) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        raw_list = data.get('data', {}).get('tokens', [])
-                        
-                        results = []
-                        for t in raw_list:
-                            results.append({
-                                'address': t['address'],
-                                'symbol': t.get('symbol', 'UNKNOWN'),
-                                'name': t.get('name', 'UNKNOWN'),
-                                'decimals': t.get('decimals', 6),
-                                'liquidity': t.get('liquidity', 0),
-                                'fdv': t.get('fdv', 0)
-                            })
-                        return results
-                    else:
-                        logger.error(f"Birdeye Trending Error: {resp.status}")
-                        return []
-            except Exception as e:
-                logger.error(f"Birdeye Trending Exception: {e}")
+
+        try:
+            # 缓存命中不消耗限流令牌
+            resp = self.http.cached(url, params=params, headers=self.headers)
+            if resp is None:
+                await self.limiter.acquire()
+                resp = await self.http.get_json(url, params=params, headers=self.headers,
+                                                ttl=Config.TRENDING_CACHE_TTL, endpoint='birdeye_trending')
+            if resp.status == 200:
+                raw_list = resp.data.get('data', {}).get('tokens', [])
+
+                results = []
+                for t in raw_list:
+                    results.append({
+                        'address': t['address'],
+                        'symbol': t.get('symbol', 'UNKNOWN'),
+                        'name': t.get('name', 'UNKNOWN'),
+                        'decimals': t.get('decimals', 6),
+                        'liquidity': t.get('liquidity', 0),
+                        'fdv': t.get('fdv', 0)
+                    })
+                return results
+            else:
+                logger.error(f"Birdeye Trending Error: {resp.status}")
                 return []
+        except Exception as e:
+            logger.error(f"Birdeye Trending Exception: {e}")
+            return []
 
-    async def get_token_history(self, session, address, days=Config.HISTORY_DAYS):
+    async def get_token_history(self, address, days=Config.HISTORY_DAYS, time_from=None):
         time_to = int(datetime.now().timestamp())
-        time_from = int((datetime.now() - timedelta(days=days)).timestamp())
-        
+        earliest = int((datetime.now() - timedelta(days=days)).timestamp())
+        # 增量同步: 只拉取 time_from 之后的 K 线，但不超过 days 的回看窗口
+        time_from = earliest if time_from is None else max(int(time_from), earliest)
+        if time_from >= time_to: return []
+
         url = f"{self.base_url}/defi/ohlcv"
         params = {
             "address": address,
             "type": Config.TIMEFRAME,
-            "time_from": time_from,
-            "time_to": time_to
+            "time_from": str(time_from),
+            "time_to": str(time_to)
         }
 
-        async with self.semaphore:
-            try:
-                async with session.get(url, params=params) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        items = data.get('data', {}).get('items', [])
-                        if not items: return []
-                        
-                        formatted = []
-                        for item in items:
-                            formatted.append((
-                                datetime.fromtimestamp(item['unixTime']), # time
-                                address,                                  # address
-                                float(item['o']),                         # open
-                                float(item['h']),                         # high
-                                float(item['l']),                         # low
-                                float(item['c']),                         # close
-                                float(item['v']),                         # volume
-                                0.0,                                      # liquidity
-                                0.0,                                      # fdv
-                                'birdeye'                                 # source
-                            ))
-                        return formatted
-                    elif resp.status == 429:
-                        logger.warning(f"Birdeye 429 for {address}, retrying...")
-                        await asyncio.sleep(2)
-                        return await self.get_token_history(session, address, days)
-                    else:
-                        return []
-            except Exception as e:
-                logger.error(f"Birdeye Fetch Error {address}: {e}")
-                return []
\ No newline at end of file
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            async with self.semaphore:
+                try:
+                    resp = await self.http.get_json(url, params=params, headers=self.headers,
+                                                    endpoint='birdeye_ohlcv')
+                except Exception as e:
+                    logger.error(f"Birdeye Fetch Error {address}: {e}")
+                    return []
+
+            if resp.status == 200:
+                self.limiter.on_success()
+                items = resp.data.get('data', {}).get('items', [])
+                if not items: return []
+                with DECODE_SECONDS.time(source='birdeye'):
+                    return decode_ohlcv_items(items, address, source='birdeye')
+            elif resp.status != 429:
+                return []
+
+            # 429: semaphore 已释放，退避期间不阻塞其他请求
+            if not self.limiter.should_retry(attempt):
+                logger.error(f"Birdeye 429 for {address}, giving up after {attempt + 1} attempts")
+                return []
+            retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+            delay = self.limiter.on_throttle(attempt, retry_after)
+            logger.warning(f"Birdeye 429 for {address}, retry {attempt + 1} in {delay:.2f}s "
+                           f"(rate {self.limiter.rate:.2f}/s)")
+            await asyncio.sleep(delay)
+            attempt += 1
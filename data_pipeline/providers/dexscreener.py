@@ -1,51 +1,67 @@
-import aiohttp
+import asyncio
 from loguru import logger
 from .base import DataProvider
+from .http_client import get_http_client
+from .rate_limit import get_limiter, parse_retry_after
 from ..config import Config
 
 class DexScreenerProvider(DataProvider):
     def __init__(self):
         self.base_url = "https://api.dexscreener.com/latest/dex"
-    
+        self.http = get_http_client()
+        self.semaphore = asyncio.Semaphore(Config.DEXSCREENER_CONCURRENCY)
+        self.limiter = get_limiter('dexscreener', max_rate=Config.DEXSCREENER_RPS)
+
     async def get_trending_tokens(self, limit=50):
-        url = f"https://api.dexscreener.com/latest/dex/tokens/solana" 
+        url = f"https://api.dexscreener.com/latest/dex/tokens/solana"
         return []
 
-    async def get_token_details_batch(self, session, addresses):
-        valid_data = []
+    async def get_token_details_batch(self, addresses):
         chunk_size = 30
-        
-        for i in range(0, len(addresses), chunk_size):
-            chunk = addresses[i:i+chunk_size]
-            addr_str = ",".join(chunk)
-            url = f"{self.base_url}/tokens/{addr_str}"
-            
+        chunks = [addresses[i:i+chunk_size] for i in range(0, len(addresses), chunk_size)]
+        results = await asyncio.gather(*[self._fetch_chunk(c) for c in chunks])
+        return [t for chunk in results for t in chunk]
+
+    async def _fetch_chunk(self, chunk):
+        addr_str = ",".join(chunk)
+        url = f"{self.base_url}/tokens/{addr_str}"
+
+        await self.limiter.acquire()
+        async with self.semaphore:
             try:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        pairs = data.get('pairs', [])
-                        
-                        best_pairs = {}
-                        for p in pairs:
-                            if p['chainId'] != Config.CHAIN: continue
-                            base_addr = p['baseToken']['address']
-                            liq = float(p.get('liquidity', {}).get('usd', 0))
-                            
-                            if base_addr not in best_pairs or liq > best_pairs[base_addr]['liquidity']:
-                                best_pairs[base_addr] = {
-                                    'address': base_addr,
-                                    'symbol': p['baseToken']['symbol'],
-                                    'name': p['baseToken']['name'],
-                                    'liquidity': liq,
-                                    'fdv': float(p.get('fdv', 0)),
-                                    'decimals': 6 # 默认
-                                }
-                        valid_data.extend(best_pairs.values())
+                resp = await self.http.get_json(url, ttl=Config.TOKEN_META_CACHE_TTL, endpoint='dexscreener_tokens')
             except Exception as e:
                 logger.error(f"DexScreener batch error: {e}")
-        
-        return valid_data
+                return []
+
+        if resp.status != 200:
+            if resp.status == 429:
+                self.limiter.on_throttle(0, parse_retry_after(resp.headers.get('Retry-After')))
+            logger.warning(f"DexScreener batch error: {resp.status}")
+            return []
+        self.limiter.on_success()
+        pairs = resp.data.get('pairs') or []
 
-    async def get_token_history(self, session, address, days):
-        return []
\ No newline at end of file
+        try:
+            best_pairs = {}
+            for p in pairs:
+                if p['chainId'] != Config.CHAIN: continue
+                base_addr = p['baseToken']['address']
+                liq = float((p.get('liquidity') or {}).get('usd', 0))
+
+                if base_addr not in best_pairs or liq > best_pairs[base_addr]['liquidity']:
+                    best_pairs[base_addr] = {
+                        'address': base_addr,
+                        'symbol': p['baseToken']['symbol'],
+                        'name': p['baseToken']['name'],
+                        'liquidity': liq,
+                        'fdv': float(p.get('fdv') or 0),
+                        'decimals': 6 # 默认
+                    }
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"DexScreener parse error: {e}")
+            return []
+        return list(best_pairs.values())
+
+    async def get_token_history(self, address, days, time_from=None):
+        return []
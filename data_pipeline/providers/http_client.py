@@ -0,0 +1,143 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+from collections import namedtuple
+import aiohttp
+from loguru import logger
+from ..config import Config
+from .decode import loads
+from ..metrics import HTTP_SECONDS, HTTP_REQUESTS
+
+HttpResponse = namedtuple('HttpResponse', ['status', 'data', 'headers'])
+
+
+class _LeaderCancelled(Exception):
+    """The caller that issued a coalesced request was cancelled before it completed."""
+
+
+class HttpClient:
+    """
+    Provider-level HTTP layer shared by every data provider.
+
+    - one keep-alive `ClientSession` per event loop, on a tuned `TCPConnector`
+    - TTL cache for slow-changing endpoints (`ttl=` per call, 200s only)
+    - request coalescing: identical in-flight GETs share a single round trip
+    """
+    def __init__(self, limit=Config.HTTP_POOL_LIMIT, limit_per_host=Config.HTTP_POOL_LIMIT_PER_HOST,
+                 dns_ttl=Config.HTTP_DNS_TTL, keepalive=Config.HTTP_KEEPALIVE,
+                 timeout=Config.HTTP_TIMEOUT, max_cache_entries=1024):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_cache_entries = max_cache_entries
+        self._session = None
+        self._loop = None
+        self._cache = {}
+        self._inflight = {}
+
+    def _get_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # dashboard 每次 asyncio.run 都是新 loop，旧 session 不能跨 loop 复用
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+            self._inflight = {}
+        return self._session
+
+    @staticmethod
+    def _key(url, params, headers):
+        return (url, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+
+    def cached(self, url, params=None, headers=None):
+        """Unexpired TTL-cached response for this GET, or None (no request is made)."""
+        hit = self._cache.get(self._key(url, params, headers))
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+        return None
+
+    async def get_json(self, url, params=None, headers=None, ttl=None, endpoint=None):
+        """
+        GET `url` and decode JSON. Non-200 responses come back with data=None.
+        `endpoint` labels the latency metrics (defaults to the host).
+        """
+        key = self._key(url, params, headers)
+        if ttl:
+            hit = self.cached(url, params, headers)
+            if hit is not None:
+                return hit
+
+        session = self._get_session()
+        fut = self._inflight.get(key)
+        while fut is not None:
+            try:
+                return await asyncio.shield(fut)
+            except _LeaderCancelled:
+                # 发起请求的调用方被取消：由等待者之一重新发起，其余继续合并到新请求
+                fut = self._inflight.get(key)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            resp = await self._fetch(session, url, params, headers, endpoint or urlsplit(url).netloc)
+            fut.set_result(resp)
+        except asyncio.CancelledError:
+            # 不能 fut.cancel()：那会把 CancelledError 传给并未被取消的等待者
+            fut.set_exception(_LeaderCancelled())
+            fut.exception()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # 无人等待时不报 "exception never retrieved"
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if ttl and resp.status == 200:
+            if len(self._cache) >= self.max_cache_entries:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = (time.monotonic() + ttl, resp)
+        return resp
+
+    async def _fetch(self, session, url, params, headers, endpoint):
+        status = 'error'
+        try:
+            with HTTP_SECONDS.time(endpoint=endpoint):
+                async with session.get(url, params=params, headers=headers) as resp:
+                    status = resp.status
+                    body = await resp.read()
+            data = loads(body) if status == 200 else None
+            return HttpResponse(status, data, dict(resp.headers))
+        finally:
+            HTTP_REQUESTS.inc(endpoint=endpoint, status=status)
+
+    def invalidate(self, url=None):
+        if url is None:
+            self._cache.clear()
+        else:
+            for key in [k for k in self._cache if k[0] == url]:
+                del self._cache[key]
+
+    async def close(self):
+        if self._session and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+
+
+_CLIENT = None
+
+
+def get_http_client():
+    """Process-wide HttpClient, shared by BirdeyeProvider, DexScreenerProvider and the dashboard."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = HttpClient()
+        logger.debug("Shared HTTP client created.")
+    return _CLIENT
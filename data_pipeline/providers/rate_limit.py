@@ -0,0 +1,142 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from ..metrics import RATELIMIT_WAIT, RATELIMIT_THROTTLED
+
+
+def parse_retry_after(value):
+    """Retry-After header -> seconds (delta-seconds or HTTP-date), None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0, rng=random):
+    """Full-jitter exponential backoff: U(0, min(cap, base * 2^attempt))."""
+    return rng.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    Async token bucket. `rate` tokens/s refill up to `capacity`.
+    `clock`/`sleep` are injectable so the bucket can be driven by a fake clock.
+    """
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=asyncio.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.blocked_until = 0.0
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    async def acquire(self):
+        """Wait for one token; returns the time spent waiting."""
+        waited = 0.0
+        # 锁保证 FIFO，排队者不会互相抢占令牌
+        async with self._lock:
+            while True:
+                now = self._refill()
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                else:
+                    delay = (1.0 - self.tokens) / self.rate
+                await self.sleep(delay)
+                waited += delay
+
+    def block_for(self, seconds):
+        """Stop handing out tokens for `seconds` (server asked us to back off)."""
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+        self.tokens = 0.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with AIMD rate control.
+
+    Every success raises the refill rate by `increase` (up to `max_rate`); a 429
+    multiplies it by `decrease` (down to `min_rate`) and pauses the bucket for
+    the server's Retry-After, if any. 429s that arrive within the Retry-After
+    (or `cooldown`) window of the last decrease belong to the same congestion
+    event and do not cut the rate again. `on_throttle` returns how long the
+    caller should sleep before its next attempt.
+
+    Args:
+        max_rate: requests/s allowed by the API plan
+        burst: bucket capacity
+        max_retries: attempts after the first before a request gives up
+        cooldown: minimum seconds between two decreases (about one round trip)
+    """
+    def __init__(self, max_rate, burst=None, name='default', min_rate=0.5, increase=0.1, decrease=0.5,
+                 max_retries=5, backoff_base=0.5, backoff_cap=30.0, cooldown=1.0,
+                 clock=time.monotonic, sleep=asyncio.sleep, rng=random):
+        self.name = name
+        self.max_rate = float(max_rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.cooldown = cooldown
+        self.rng = rng
+        self.bucket = TokenBucket(max_rate, burst or max_rate, clock=clock, sleep=sleep)
+        self.throttled = 0
+        self.hold_until = float('-inf')
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    async def acquire(self):
+        waited = await self.bucket.acquire()
+        RATELIMIT_WAIT.observe(waited, limiter=self.name)
+        return waited
+
+    def on_success(self):
+        self.bucket.rate = min(self.max_rate, self.bucket.rate + self.increase)
+
+    def on_throttle(self, attempt, retry_after=None):
+        self.throttled += 1
+        RATELIMIT_THROTTLED.inc(limiter=self.name)
+        now = self.bucket.clock()
+        # 并发请求在同一拥塞窗口内收到的多个 429 只降速一次
+        if now >= self.hold_until:
+            self.bucket.rate = max(self.min_rate, self.bucket.rate * self.decrease)
+            self.hold_until = now + max(self.cooldown, retry_after or 0.0)
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap, self.rng)
+        if retry_after is not None:
+            self.bucket.block_for(retry_after)
+            delay = max(delay, retry_after)
+        return delay
+
+    def should_retry(self, attempt):
+        return attempt < self.max_retries
+
+
+_LIMITERS = {}
+
+
+def get_limiter(name, **kwargs):
+    """Process-wide limiter per upstream API, so every provider instance shares one budget."""
+    if name not in _LIMITERS:
+        _LIMITERS[name] = AdaptiveRateLimiter(name=name, **kwargs)
+    return _LIMITERS[name]
@@ -0,0 +1,235 @@
+"""
+Offline stand-in for the Birdeye API.
+
+ReplayServer serves Birdeye-compatible `/defi/token_trending` and `/defi/ohlcv`
+responses from recorded payloads or synthetic data, with injectable latency,
+5xx errors and 429s. ReplayProvider is a BirdeyeProvider pointed at it, so the
+whole DataManager / IngestPipeline / DBManager path runs without API credits.
+
+Record real payloads once (uses BIRDEYE_API_KEY), then serve them
+out-of-process so the server does not compete with the pipeline for CPU:
+    python -m data_pipeline.providers.replay record --out recorded --limit 50
+    python -m data_pipeline.providers.replay serve --payloads recorded --port 8900
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import zlib
+import numpy as np
+from aiohttp import web
+from loguru import logger
+from ..config import Config
+from .birdeye import BirdeyeProvider
+from .rate_limit import AdaptiveRateLimiter
+
+
+class ReplayServer:
+    """
+    Args:
+        payload_dir: directory with `trending.json` and `ohlcv/<address>.json`
+            (raw response bodies); None -> synthetic tokens and candles
+        n_tokens / n_candles: size of the synthetic universe
+        latency / jitter: per-request delay in seconds (uniform jitter)
+        error_rate: fraction of ohlcv requests answered with 500
+        rate_429: fraction of ohlcv requests answered with 429 + Retry-After
+    """
+    def __init__(self, payload_dir=None, n_tokens=100, n_candles=10080, latency=0.05, jitter=0.02,
+                 error_rate=0.0, rate_429=0.0, retry_after=1.0, host='127.0.0.1', port=0, seed=0):
+        self.payload_dir = payload_dir
+        self.n_tokens = n_tokens
+        self.n_candles = n_candles
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.requests = {'trending': 0, 'ohlcv': 0, '429': 0, '500': 0}
+        self._runner = None
+        self._trending = None
+        self._candles = {}
+        self._bodies = {}
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._load()
+        app = web.Application()
+        app.router.add_get('/defi/token_trending', self._handle_trending)
+        app.router.add_get('/defi/ohlcv', self._handle_ohlcv)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Replay server on {self.url} serving {len(self._trending)} tokens")
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _load(self):
+        if self.payload_dir:
+            with open(os.path.join(self.payload_dir, 'trending.json')) as f:
+                self._trending = json.load(f)['data']['tokens']
+            ohlcv_dir = os.path.join(self.payload_dir, 'ohlcv')
+            for name in os.listdir(ohlcv_dir):
+                with open(os.path.join(ohlcv_dir, name)) as f:
+                    items = json.load(f)['data']['items']
+                self._candles[name[:-len('.json')]] = items
+            return
+
+        rng = np.random.default_rng(self.seed)
+        self._trending = []
+        for i in range(self.n_tokens):
+            address = f"Replay{i:04d}" + "1" * 34
+            self._trending.append({
+                'address': address, 'symbol': f"R{i}", 'name': f"Replay {i}", 'decimals': 6,
+                'liquidity': float(rng.uniform(1e6, 5e6)), 'fdv': float(rng.uniform(2e7, 1e8))
+            })
+
+    def _synthetic_items(self, address, time_from, time_to):
+        # 按需生成，按 address 固定随机种子，保证同一 token 多次请求结果一致
+        end = time_to - time_to % 60
+        start = max(time_from, end - 60 * (self.n_candles - 1))
+        n = max(0, (end - start) // 60 + 1)
+        if n == 0:
+            return []
+        rng = np.random.default_rng(zlib.crc32(address.encode()))
+        close = np.exp(np.cumsum(rng.normal(0, 0.01, n))) * 0.01
+        high, low = close * 1.01, close * 0.99
+        vol = rng.lognormal(8, 1, n)
+        ts = np.arange(end - 60 * (n - 1), end + 1, 60)
+        return [{'unixTime': int(t), 'o': float(c), 'h': float(h), 'l': float(l), 'c': float(c),
+                 'v': float(v), 'type': '1m'}
+                for t, c, h, l, v in zip(ts, close, high, low, vol)]
+
+    async def _delay(self):
+        d = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if d > 0:
+            await asyncio.sleep(d)
+
+    async def _handle_trending(self, request):
+        self.requests['trending'] += 1
+        await self._delay()
+        limit = int(request.query.get('limit', 100))
+        return web.json_response({'data': {'tokens': self._trending[:limit]}, 'success': True})
+
+    async def _handle_ohlcv(self, request):
+        self.requests['ohlcv'] += 1
+        await self._delay()
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            self.requests['429'] += 1
+            return web.Response(status=429, headers={'Retry-After': str(self.retry_after)})
+        if roll < self.rate_429 + self.error_rate:
+            self.requests['500'] += 1
+            return web.Response(status=500)
+
+        address = request.query['address']
+        time_from = int(request.query.get('time_from', 0))
+        time_to = int(request.query.get('time_to', time.time()))
+        if self.payload_dir:
+            items = [it for it in self._candles.get(address, []) if time_from <= it['unixTime'] <= time_to]
+            return web.json_response({'data': {'items': items}, 'success': True})
+
+        # 合成数据按 (address, 分钟窗口) 缓存序列化结果，避免服务端编码拖慢压测
+        key = (address, time_from, time_to - time_to % 60)
+        body = self._bodies.get(key)
+        if body is None:
+            items = self._synthetic_items(address, time_from, time_to)
+            body = json.dumps({'data': {'items': items}, 'success': True}).encode()
+            self._bodies[key] = body
+        return web.Response(body=body, content_type='application/json')
+
+
+class ReplayProvider(BirdeyeProvider):
+    """BirdeyeProvider against a ReplayServer, with its own rate-limit budget."""
+    def __init__(self, base_url, rps=None):
+        super().__init__()
+        self.base_url = base_url
+        self.limiter = AdaptiveRateLimiter(
+            name='replay',
+            max_rate=rps or Config.BIRDEYE_RPS,
+            burst=Config.BIRDEYE_BURST,
+            max_retries=Config.BIRDEYE_MAX_RETRIES,
+            backoff_base=Config.BIRDEYE_BACKOFF_BASE,
+            backoff_cap=Config.BIRDEYE_BACKOFF_CAP
+        )
+
+
+async def record_payloads(out_dir, limit=50):
+    """Save raw Birdeye trending + ohlcv responses for later replay."""
+    provider = BirdeyeProvider()
+    os.makedirs(os.path.join(out_dir, 'ohlcv'), exist_ok=True)
+    resp = await provider.http.get_json(
+        f"{provider.base_url}/defi/token_trending",
+        params={"sort_by": "rank", "sort_type": "asc", "offset": "0", "limit": str(limit)},
+        headers=provider.headers
+    )
+    if resp.status != 200:
+        logger.error(f"Trending request failed: {resp.status}")
+        return
+    with open(os.path.join(out_dir, 'trending.json'), 'w') as f:
+        json.dump(resp.data, f)
+
+    time_to = int(time.time())
+    time_from = time_to - Config.HISTORY_DAYS * 86400
+    for t in resp.data.get('data', {}).get('tokens', []):
+        await provider.limiter.acquire()
+        r = await provider.http.get_json(
+            f"{provider.base_url}/defi/ohlcv",
+            params={"address": t['address'], "type": Config.TIMEFRAME,
+                    "time_from": str(time_from), "time_to": str(time_to)},
+            headers=provider.headers
+        )
+        if r.status == 200:
+            with open(os.path.join(out_dir, 'ohlcv', f"{t['address']}.json"), 'w') as f:
+                json.dump(r.data, f)
+    await provider.http.close()
+    logger.success(f"Recorded payloads to {out_dir}")
+
+
+async def _serve_forever(server):
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help="Record real Birdeye payloads")
+    rec.add_argument('--out', type=str, required=True, help="Output directory")
+    rec.add_argument('--limit', type=int, default=50, help="Number of trending tokens to record")
+    srv = sub.add_parser('serve', help="Run a replay server")
+    srv.add_argument('--payloads', type=str, default=None, help="Recorded payload directory (default: synthetic)")
+    srv.add_argument('--port', type=int, default=8900)
+    srv.add_argument('--tokens', type=int, default=100)
+    srv.add_argument('--candles', type=int, default=10080)
+    srv.add_argument('--latency', type=float, default=0.05)
+    srv.add_argument('--error-rate', type=float, default=0.0)
+    srv.add_argument('--rate-429', type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.cmd == 'record':
+        asyncio.run(record_payloads(args.out, args.limit))
+    else:
+        server = ReplayServer(payload_dir=args.payloads, n_tokens=args.tokens, n_candles=args.candles,
+                              latency=args.latency, error_rate=args.error_rate, rate_429=args.rate_429,
+                              port=args.port)
+        try:
+            asyncio.run(_serve_forever(server))
+        except KeyboardInterrupt:
+            pass
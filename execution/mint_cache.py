@@ -0,0 +1,113 @@
+"""
+Mint metadata cache: SPL token decimals never change, so each mint is fetched
+once and kept in memory and in a small SQLite file shared across processes
+(runner, trader, dashboard).
+
+Misses are fetched with getMultipleAccounts (jsonParsed, up to 100 mints per
+call), and concurrent lookups of the same mint share one in-flight request.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from loguru import logger
+from solders.pubkey import Pubkey
+
+DEFAULT_PATH = os.getenv("MINT_CACHE_PATH", "mint_cache.sqlite")
+MAX_ACCOUNTS_PER_CALL = 100  # getMultipleAccounts 上限
+
+
+class MintCache:
+    def __init__(self, client=None, path=DEFAULT_PATH, known=None):
+        self.client = client
+        self.path = path
+        self._decimals = self.read_store(path)
+        self._decimals.update(known or {})
+        self._missing = set()  # 链上不存在或不是 mint 的地址，本进程内不再查询
+        self._inflight = {}    # mint -> 正在进行的批量查询 Task
+
+    @staticmethod
+    def read_store(path=DEFAULT_PATH):
+        """{mint: decimals} from the on-disk store (no RPC, usable from sync code)."""
+        if not os.path.exists(path):
+            return {}
+        try:
+            with sqlite3.connect(path) as db:
+                return dict(db.execute("SELECT address, decimals FROM mints").fetchall())
+        except sqlite3.Error as e:
+            logger.warning(f"Mint cache store unreadable ({e}), starting empty")
+            return {}
+
+    def _write_store(self, found):
+        try:
+            with sqlite3.connect(self.path) as db:
+                db.execute("CREATE TABLE IF NOT EXISTS mints "
+                           "(address TEXT PRIMARY KEY, decimals INTEGER NOT NULL, updated REAL)")
+                now = time.time()
+                db.executemany("INSERT OR REPLACE INTO mints VALUES (?, ?, ?)",
+                               [(m, d, now) for m, d in found.items()])
+        except sqlite3.Error as e:
+            logger.warning(f"Mint cache store write failed: {e}")
+
+    def get(self, mint):
+        """Cached decimals or None, without any RPC."""
+        return self._decimals.get(mint)
+
+    async def _fetch(self, mints):
+        keys, valid = [], []
+        for m in mints:
+            try:
+                keys.append(Pubkey.from_string(m))
+                valid.append(m)
+            except Exception:
+                self._missing.add(m)
+        if not keys:
+            return
+        try:
+            resp = await self.client.get_multiple_accounts_json_parsed(keys)
+        except Exception as e:
+            logger.warning(f"getMultipleAccounts failed for {len(keys)} mints: {e}")
+            return
+        found = {}
+        for m, acc in zip(valid, resp.value):
+            try:
+                found[m] = int(acc.data.parsed['info']['decimals'])
+            except Exception:
+                self._missing.add(m)
+        if found:
+            self._decimals.update(found)
+            self._write_store(found)
+
+    def _start(self, mints):
+        task = asyncio.ensure_future(self._fetch(mints))
+        for m in mints:
+            self._inflight[m] = task
+
+        def _done(t):
+            for m in mints:
+                if self._inflight.get(m) is t:
+                    del self._inflight[m]
+        task.add_done_callback(_done)
+        return task
+
+    async def warm(self, mints):
+        """Fetch every uncached mint in batches; returns how many are cached afterwards."""
+        mints = list(dict.fromkeys(mints))
+        todo = [m for m in mints if m not in self._decimals and m not in self._missing and m not in self._inflight]
+        tasks = [self._start(todo[i:i + MAX_ACCOUNTS_PER_CALL]) for i in range(0, len(todo), MAX_ACCOUNTS_PER_CALL)]
+        tasks += list({id(t): t for m, t in self._inflight.items() if m in mints}.values())
+        if tasks:
+            # shield: 调用方被取消时不打断其他等待者共享的查询
+            await asyncio.gather(*(asyncio.shield(t) for t in tasks))
+        return sum(m in self._decimals for m in mints)
+
+    async def decimals(self, mint, default=6):
+        d = self._decimals.get(mint)
+        if d is not None:
+            return d
+        if mint in self._missing:
+            return default
+        task = self._inflight.get(mint) or self._start([mint])
+        await asyncio.shield(task)
+        d = self._decimals.get(mint)
+        return default if d is None else d
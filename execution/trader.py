@@ -6,11 +6,13 @@ from solana.rpc.types import TokenAccountOpts
 from .config import ExecutionConfig
 from .rpc_handler import QuickNodeClient
 from .jupiter import JupiterAggregator
+from .utils import mint_cache
 
 class SolanaTrader:
     def __init__(self):
         self.rpc = QuickNodeClient()
         self.jup = JupiterAggregator()
+        self.mints = mint_cache(self.rpc.client)
         self.is_running = True
         self.TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
 
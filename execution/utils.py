@@ -1,17 +1,17 @@
 from solana.rpc.async_api import AsyncClient
-from solders.pubkey import Pubkey
 from .config import ExecutionConfig
+from .mint_cache import MintCache
+
+_mint_cache = None
+
+
+def mint_cache(client: AsyncClient) -> MintCache:
+    """Process-wide MintCache, bound to the first client it is requested with."""
+    global _mint_cache
+    if _mint_cache is None:
+        _mint_cache = MintCache(client, known={ExecutionConfig.SOL_MINT: 9})
+    return _mint_cache
+
 
 async def get_mint_decimals(mint_str: str, client: AsyncClient) -> int:
-    if mint_str == ExecutionConfig.SOL_MINT:
-        return 9
-    try:
-        pubkey = Pubkey.from_string(mint_str)
-        resp = await client.get_account_info(pubkey)
-        if resp.value is None:
-            return 6
-        resp_parsed = await client.get_account_info_json_parsed(pubkey)
-        decimals = resp_parsed.value.data.parsed['info']['decimals']
-        return int(decimals)
-    except Exception:
-        return 6
\ No newline at end of file
+    return await mint_cache(client).decimals(mint_str)
@@ -1,4 +1,6 @@
 import math
+import os
+import sys
 import argparse
 import random
 import copy
@@ -13,48 +15,10 @@ import torch.nn.functional as F
 from torch.utils.data import Dataset, DataLoader
 import seaborn as sns
 
-sns.set_theme(style="whitegrid")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_core.lord import NewtonSchulzLowRankDecay, StableRankMonitor
 
-class NewtonSchulzLowRankDecay:
-    def __init__(self, named_parameters, decay_rate=1e-3, num_iterations=5, target_keywords=None):
-        self.decay_rate = decay_rate
-        self.num_iterations = num_iterations
-        self.target_keywords = target_keywords
-        self.params_to_decay = []
-        
-        for name, param in named_parameters:
-            if not param.requires_grad or param.ndim != 2:
-                continue
-            if self.target_keywords and not any(k in name for k in self.target_keywords):
-                continue
-            self.params_to_decay.append(param)
-        
-    @torch.no_grad()
-    def step(self):
-        for W in self.params_to_decay:
-            orig_dtype = W.dtype
-            X = W.float()
-            r, c = X.shape
-            
-            transposed = False
-            if r > c:
-                X = X.T
-                transposed = True
-              
-            norm = X.norm() + 1e-8
-            X = X / norm
-            
-            Y = X
-            I = torch.eye(min(r, c), device=X.device)
-            
-            for _ in range(self.num_iterations):
-                A = Y.T @ Y
-                Y = 0.5 * Y @ (3.0 * I - A)
-            
-            if transposed:
-                Y = Y.T
-            
-            W.sub_(self.decay_rate * Y.to(orig_dtype))
+sns.set_theme(style="whitegrid")
 
 @dataclass
 class ModelConfig:
@@ -147,15 +111,10 @@ class ModularAdditionDataset(Dataset):
         i, j, eq, res = self.data[idx]
         return torch.tensor([i, j, eq], dtype=torch.long), torch.tensor(res, dtype=torch.long)
 
-def get_stable_rank(model):
-    ranks = []
-    for name, param in model.named_parameters():
-        if "q_proj" in name or "k_proj" in name:
-            W = param.detach().float()
-            S = torch.linalg.svdvals(W)
-            # Stable Rank = sum(sigma^2) / max(sigma)^2 = ||W||_F^2 / ||W||_2^2
-            ranks.append((S.norm()**2 / (S[0]**2 + 1e-9)).item())
-    return sum(ranks) / len(ranks) if ranks else 0
+def get_stable_rank(model, monitor=None):
+    # Stable Rank = sum(sigma^2) / max(sigma)^2 = ||W||_F^2 / ||W||_2^2
+    monitor = monitor or StableRankMonitor(model, target_keywords=["q_proj", "k_proj"])
+    return monitor.compute()
 
 def train_run(args, train_frac, decay_type, decay_val, device):
     p = 113
@@ -190,6 +149,7 @@ def train_run(args, train_frac, decay_type, decay_val, device):
     history = {'step': [], 'val_acc': [], 'rank': []}
     
     consecutive_high_acc = 0
+    rank_monitor = StableRankMonitor(model, target_keywords=["q_proj", "k_proj"])
     
     pbar = tqdm(range(args.steps), desc=f"Train({decay_type}={decay_val}, Frac={train_frac})", leave=False)
     iter_loader = iter(train_loader)
@@ -218,7 +178,7 @@ def train_run(args, train_frac, decay_type, decay_val, device):
             val_acc = corr / tot
             model.train()
             
-            rank = get_stable_rank(model)
+            rank = get_stable_rank(model, rank_monitor)
             max_val_acc = max(max_val_acc, val_acc)
             
             history['step'].append(step)
@@ -3,96 +3,10 @@ import torch.nn as nn
 import torch.nn.functional as F
 from .config import ModelConfig
 from .ops import OPS_CONFIG
+from .lord import NewtonSchulzLowRankDecay, StableRankMonitor
 
-
-class NewtonSchulzLowRankDecay:
-    """
-    Low-Rank Decay (LoRD) using Newton-Schulz iteration.
-    
-    A more efficient regularization method that targets low-rank structure
-    in attention and key parameters. Uses Newton-Schulz iteration to compute
-    the minimum singular vectors without explicit SVD.
-    
-    Args:
-        named_parameters: Model's named parameters
-        decay_rate: Strength of low-rank decay
-        num_iterations: Number of Newton-Schulz iterations (default: 5)
-        target_keywords: If specified, only decay parameters matching these keywords
-    """
-    def __init__(self, named_parameters, decay_rate=1e-3, num_iterations=5, target_keywords=None):
-        self.decay_rate = decay_rate
-        self.num_iterations = num_iterations
-        self.target_keywords = target_keywords or ["qk_norm", "attention"]
-        self.params_to_decay = []
-        
-        for name, param in named_parameters:
-            if not param.requires_grad or param.ndim != 2:
-                continue
-            if not any(k in name for k in self.target_keywords):
-                continue
-            self.params_to_decay.append((name, param))
-    
-    @torch.no_grad()
-    def step(self):
-        """Apply Newton-Schulz low-rank decay to attention parameters."""
-        for name, W in self.params_to_decay:
-            orig_dtype = W.dtype
-            X = W.float()
-            r, c = X.shape
-            
-            # Transpose if needed for efficiency
-            transposed = False
-            if r > c:
-                X = X.T
-                transposed = True
-            
-            # Normalize by spectral norm
-            norm = X.norm() + 1e-8
-            X = X / norm
-            
-            # Initialize Y for Newton-Schulz iteration
-            Y = X
-            I = torch.eye(X.shape[-1], device=X.device, dtype=X.dtype)
-            
-            # Newton-Schulz iteration: Y_{k+1} = 0.5 * Y_k * (3*I - Y_k^T * Y_k)
-            # This converges to the orthogonal matrix with same singular vectors
-            for _ in range(self.num_iterations):
-                A = Y.T @ Y
-                Y = 0.5 * Y @ (3.0 * I - A)
-            
-            if transposed:
-                Y = Y.T
-            
-            # Apply low-rank decay
-            W.sub_(self.decay_rate * Y.to(orig_dtype))
-
-
-class StableRankMonitor:
-    """Monitor the effective rank (stable rank) of model parameters."""
-    def __init__(self, model, target_keywords=None):
-        self.model = model
-        self.target_keywords = target_keywords or ["q_proj", "k_proj", "attention"]
-        self.history = []
-    
-    @torch.no_grad()
-    def compute(self):
-        """Compute average stable rank of target parameters."""
-        ranks = []
-        for name, param in self.model.named_parameters():
-            if param.ndim != 2:
-                continue
-            if not any(k in name for k in self.target_keywords):
-                continue
-            
-            W = param.detach().float()
-            S = torch.linalg.svdvals(W)
-            # Stable Rank = ||W||_F^2 / ||W||_2^2
-            stable_rank = (S.norm() ** 2) / (S[0] ** 2 + 1e-9)
-            ranks.append(stable_rank.item())
-        
-        avg_rank = sum(ranks) / len(ranks) if ranks else 0.0
-        self.history.append(avg_rank)
-        return avg_rank
+# torch>=2.4 提供单算子 RMSNorm
+_HAS_RMS_NORM = hasattr(F, 'rms_norm')
 
 
 class RMSNorm(nn.Module):
@@ -103,6 +17,8 @@ class RMSNorm(nn.Module):
         self.weight = nn.Parameter(torch.ones(d_model))
     
     def forward(self, x):
+        if _HAS_RMS_NORM:
+            return F.rms_norm(x, self.weight.shape, self.weight, self.eps)
         rms = torch.sqrt(torch.mean(x ** 2, dim=-1, keepdim=True) + self.eps)
         return (x / rms) * self.weight
 
@@ -112,7 +28,8 @@ class QKNorm(nn.Module):
     def __init__(self, d_model, eps=1e-6):
         super().__init__()
         self.eps = eps
-        self.scale = nn.Parameter(torch.ones(1, 1, 1, d_model) * (d_model ** -0.5))
+        # 单位向量点积为 cos；两侧各乘 d**0.25 后 logits = cos * sqrt(d)，与未归一化 q·k/sqrt(d) 的温度相当
+        self.scale = nn.Parameter(torch.ones(1, 1, 1, d_model) * (d_model ** 0.25))
     
     def forward(self, q, k):
         # Normalize Q and K independently
@@ -155,15 +72,64 @@ class MTPHead(nn.Module):
         task_logits = self.task_router(x)
         task_probs = F.softmax(task_logits, dim=-1)
         
-        # Compute all task outputs
-        task_outputs = [head(x) for head in self.task_heads]
-        task_outputs = torch.stack(task_outputs, dim=1)  # [B, num_tasks, vocab_size]
+        # Compute all task outputs with one matmul over the concatenated heads
+        weight = torch.cat([head.weight for head in self.task_heads])
+        bias = torch.cat([head.bias for head in self.task_heads])
+        task_outputs = F.linear(x, weight, bias).unflatten(-1, (self.num_tasks, -1))  # [..., num_tasks, vocab_size]
         
         # Weighted combination
-        weighted = (task_probs.unsqueeze(-1) * task_outputs).sum(dim=1)
+        weighted = (task_probs.unsqueeze(-1) * task_outputs).sum(dim=-2)
         return weighted, task_probs
 
 
+def convert_legacy_attention(state_dict, prefix=''):
+    """
+    Rename nn.MultiheadAttention weights (in_proj_weight/in_proj_bias) under `prefix`
+    to CausalSelfAttention's fused qkv.weight/qkv.bias, in place. Both pack rows as
+    [q; k; v], and out_proj keys are shared, so no tensor is touched.
+    """
+    for old, new in (('in_proj_weight', 'qkv.weight'), ('in_proj_bias', 'qkv.bias')):
+        for key in [k for k in state_dict if k.startswith(prefix) and k.rpartition('.')[2] == old]:
+            state_dict[key[:-len(old)] + new] = state_dict.pop(key)
+    return state_dict
+
+
+class CausalSelfAttention(nn.Module):
+    """
+    Multi-head self-attention on F.scaled_dot_product_attention with a fused QKV
+    projection. When a QKNorm is passed, q/k are normalised and its learned scale
+    acts as the softmax temperature (SDPA scale=1).
+    """
+    def __init__(self, d_model, nhead, dropout=0.0):
+        super().__init__()
+        self.nhead = nhead
+        self.head_dim = d_model // nhead
+        self.dropout = dropout
+        self.qkv = nn.Linear(d_model, 3 * d_model)
+        self.out_proj = nn.Linear(d_model, d_model)
+        # 兼容 nn.MultiheadAttention 的旧 checkpoint
+        self._register_load_state_dict_pre_hook(self._convert_legacy)
+
+    @staticmethod
+    def _convert_legacy(state_dict, prefix, *args):
+        convert_legacy_attention(state_dict, prefix)
+
+    def forward(self, x, qk_norm=None, mask=None, is_causal=True):
+        B, T, D = x.shape
+        q, k, v = self.qkv(x).view(B, T, 3, self.nhead, self.head_dim).permute(2, 0, 3, 1, 4)
+        if qk_norm is not None:
+            q, k = qk_norm(q, k)
+            # 抵消 SDPA 默认的 1/sqrt(head_dim)，等效 scale=1（scale 参数需 torch>=2.1）
+            q = q * self.head_dim ** 0.5
+        out = F.scaled_dot_product_attention(
+            q, k, v,
+            attn_mask=mask,
+            dropout_p=self.dropout if self.training else 0.0,
+            is_causal=is_causal and mask is None,
+        )
+        return self.out_proj(out.transpose(1, 2).reshape(B, T, D))
+
+
 class LoopedTransformerLayer(nn.Module):
     """Looped Transformer Layer - recurrent processing within a layer"""
     def __init__(self, d_model, nhead, dim_feedforward, num_loops=3, dropout=0.1):
@@ -175,8 +141,8 @@ class LoopedTransformerLayer(nn.Module):
         # QK-Norm attention
         self.qk_norm = QKNorm(d_model // nhead)
         
-        # Standard attention components
-        self.attention = nn.MultiheadAttention(d_model, nhead, batch_first=True, dropout=dropout)
+        # Fused QKV + SDPA attention
+        self.attention = CausalSelfAttention(d_model, nhead, dropout=dropout)
         
         # RMSNorm instead of LayerNorm
         self.norm1 = RMSNorm(d_model)
@@ -186,13 +152,21 @@ class LoopedTransformerLayer(nn.Module):
         self.ffn = SwiGLU(d_model, dim_feedforward)
         
         self.dropout = nn.Dropout(dropout)
+        
+        # MultiheadAttention 时代的 checkpoint 从未用过 qk_norm，其 scale 不是可用的温度
+        self._register_load_state_dict_pre_hook(self._reset_legacy_qk_gain)
+    
+    def _reset_legacy_qk_gain(self, state_dict, prefix, *args):
+        key = prefix + 'qk_norm.scale'
+        if prefix + 'attention.in_proj_weight' in state_dict and key in state_dict:
+            state_dict[key] = torch.full_like(state_dict[key], (self.d_model // self.nhead) ** 0.25)
     
     def forward(self, x, mask=None, is_causal=False):
         # Looped processing - recurrent refinement
         for _ in range(self.num_loops):
             # Self-attention with residual
             x_norm = self.norm1(x)
-            attn_out, _ = self.attention(x_norm, x_norm, x_norm, attn_mask=mask, is_causal=is_causal)
+            attn_out = self.attention(x_norm, qk_norm=self.qk_norm, mask=mask, is_causal=is_causal)
             x = x + self.dropout(attn_out)
             
             # FFN with residual
@@ -249,23 +223,45 @@ class AlphaGPT(nn.Module):
         self.mtp_head = MTPHead(self.d_model, self.vocab_size, num_tasks=3)
         self.head_critic = nn.Linear(self.d_model, 1)
 
-    def forward(self, idx):
+    def _encode(self, idx):
         # idx: [Batch, SeqLen]
         B, T = idx.size()
         
         x = self.token_emb(idx) + self.pos_emb[:, :T, :]
         
-        # Causal Mask
-        mask = nn.Transformer.generate_square_subsequent_mask(T).to(idx.device)
-        
-        # Process through looped transformer
-        x = self.blocks(x, mask=mask, is_causal=True)
-        x = self.ln_f(x)
-        
+        # Process through looped transformer (causal attention, no explicit mask)
+        x = self.blocks(x, is_causal=True)
+        return self.ln_f(x)
+
+    def forward(self, idx):
+        x = self._encode(idx)
         last_emb = x[:, -1, :]
         
         # Multi-task pooling head for logits
         logits, task_probs = self.mtp_head(last_emb)
         value = self.head_critic(last_emb)
         
-        return logits, value, task_probs
\ No newline at end of file
+        return logits, value, task_probs
+
+    def forward_step(self, buf, pos):
+        """
+        forward() for the prefix buf[:, :pos+1] of a fixed-length token buffer.
+        pos is a 1-element long tensor, so input shapes never change during
+        sampling and a compiled model is traced once instead of per length.
+        """
+        x = self._encode(buf)
+        last_emb = torch.index_select(x, 1, pos).squeeze(1)
+        logits, task_probs = self.mtp_head(last_emb)
+        value = self.head_critic(last_emb)
+        return logits, value, task_probs
+
+    def forward_all(self, idx):
+        """
+        Logits and values at every position in one pass: [B, T, V], [B, T].
+        Position t sees idx[:, :t+1] only (causal), so this equals calling
+        forward() on each prefix.
+        """
+        x = self._encode(idx)
+        logits, task_probs = self.mtp_head(x)
+        value = self.head_critic(x).squeeze(-1)
+        return logits, value, task_probs
@@ -0,0 +1,182 @@
+"""
+Diversity-aware hall of fame for mined formulas.
+
+Each member keeps a fingerprint of its [tokens, time] signal: the values at a
+fixed random sample of positions, centred and scaled to unit norm, so the dot
+product of two fingerprints estimates the Pearson correlation of the signals.
+A candidate is checked against every member with one matrix-vector product and
+is admitted only if it is not near-identical to a member, or if it beats all
+the members it duplicates.
+
+Persisted as JSON (formulas, scores, base64 float16 fingerprints):
+
+    {"version": 1, "sketch": {...}, "members": [{"formula": [...], "score": 1.2, ...}]}
+
+`load_formulas(path)` reads the formulas back, best first, for deployment.
+"""
+import base64
+import json
+import os
+import numpy as np
+import torch
+from .config import ModelConfig
+from .checkpoint import atomic_json_dump
+
+ARCHIVE_VERSION = 1
+
+
+def load_formulas(path=None, top=None):
+    """Formulas in an archive file, best first."""
+    with open(path or ModelConfig.ARCHIVE_PATH, "r") as f:
+        data = json.load(f)
+    members = sorted(data.get("members", []), key=lambda m: m["score"], reverse=True)
+    return [m["formula"] for m in members[:top]]
+
+
+class FormulaArchive:
+    def __init__(self, capacity=None, corr_threshold=None, sketch_dim=None, seed=0):
+        self.capacity = capacity or ModelConfig.ARCHIVE_SIZE
+        self.corr_threshold = corr_threshold if corr_threshold is not None else ModelConfig.ARCHIVE_CORR_THRESHOLD
+        self.sketch_dim = sketch_dim or ModelConfig.ARCHIVE_SKETCH_DIM
+        self.seed = seed
+        self.shape = None       # signal shape the sample positions were drawn for
+        self._positions = None
+        self.formulas = []
+        self.scores = torch.empty(0)
+        self.fingerprints = torch.empty(0, self.sketch_dim)
+
+    def __len__(self):
+        return len(self.formulas)
+
+    def _sample_positions(self, shape):
+        n = int(np.prod(shape))
+        g = torch.Generator().manual_seed(self.seed)
+        k = min(self.sketch_dim, n)
+        return torch.randperm(n, generator=g)[:k].sort().values
+
+    def fingerprint(self, signal):
+        """[tokens, time] signal -> unit-norm centred sample of sketch_dim values (CPU, float32)."""
+        shape = tuple(signal.shape)
+        if self.shape != shape:
+            if len(self):
+                raise ValueError(f"Signal shape {shape} does not match archive sketch shape {self.shape}")
+            self.shape = shape
+            self._positions = self._sample_positions(shape)
+        x = signal.reshape(-1)[self._positions.to(signal.device)].float().cpu()
+        x = torch.nan_to_num(x, nan=0.0, posinf=0.0, neginf=0.0)
+        x = x - x.mean()
+        fp = torch.zeros(self.sketch_dim)
+        fp[:len(x)] = x / (x.norm() + 1e-12)
+        return fp
+
+    def min_score(self):
+        return self.scores.min().item() if len(self) >= self.capacity else -float('inf')
+
+    def offer(self, score, formula, signal):
+        """Try to admit a scored formula; returns True if the archive changed."""
+        if score <= self.min_score():
+            return False
+        return self._admit(score, formula, self.fingerprint(signal))
+
+    def _admit(self, score, formula, fp):
+        if score <= self.min_score():
+            return False
+        if len(self):
+            corr = (self.fingerprints @ fp).abs()  # [members]
+            dup = corr >= self.corr_threshold
+            if dup.any():
+                if score <= self.scores[dup].max().item():
+                    return False
+                # 比所有相近成员都好：替换掉它们
+                keep = ~dup
+                self.formulas = [f for f, k in zip(self.formulas, keep.tolist()) if k]
+                self.scores = self.scores[keep]
+                self.fingerprints = self.fingerprints[keep]
+
+        if len(self) >= self.capacity:
+            worst = int(self.scores.argmin())
+            keep = torch.arange(len(self)) != worst
+            self.formulas.pop(worst)
+            self.scores = self.scores[keep]
+            self.fingerprints = self.fingerprints[keep]
+
+        self.formulas.append(list(formula))
+        self.scores = torch.cat([self.scores, torch.tensor([float(score)])])
+        self.fingerprints = torch.cat([self.fingerprints, fp.unsqueeze(0)])
+        return True
+
+    def members(self):
+        order = torch.argsort(self.scores, descending=True).tolist()
+        return [(self.scores[i].item(), self.formulas[i]) for i in order]
+
+    def state_dict(self):
+        order = torch.argsort(self.scores, descending=True).tolist()
+        return {
+            "version": ARCHIVE_VERSION,
+            "capacity": self.capacity,
+            "corr_threshold": self.corr_threshold,
+            "sketch": {"dim": self.sketch_dim, "seed": self.seed,
+                       "shape": list(self.shape) if self.shape else None},
+            "members": [{
+                "formula": self.formulas[i],
+                "score": self.scores[i].item(),
+                "fingerprint": base64.b64encode(
+                    self.fingerprints[i].numpy().astype(np.float16).tobytes()).decode("ascii"),
+            } for i in order],
+        }
+
+    def load_state_dict(self, state):
+        sketch = state["sketch"]
+        self.capacity = state["capacity"]
+        self.corr_threshold = state["corr_threshold"]
+        self.sketch_dim, self.seed = sketch["dim"], sketch["seed"]
+        self.shape = tuple(sketch["shape"]) if sketch["shape"] else None
+        self._positions = self._sample_positions(self.shape) if self.shape else None
+        members = state["members"]
+        self.formulas = [m["formula"] for m in members]
+        self.scores = torch.tensor([m["score"] for m in members], dtype=torch.float32)
+        self.fingerprints = torch.stack([
+            torch.from_numpy(np.frombuffer(base64.b64decode(m["fingerprint"]), dtype=np.float16).astype(np.float32))
+            for m in members
+        ]) if members else torch.empty(0, self.sketch_dim)
+
+    def merge(self, state):
+        """Offer every member of another archive's state_dict (same sketch) to this one."""
+        other = FormulaArchive()
+        other.load_state_dict(state)
+        if self.shape is None:
+            self.shape, self._positions = other.shape, other._positions
+        elif other.shape is not None and other.shape != self.shape:
+            raise ValueError("Cannot merge archives sketched on different signal shapes")
+        for i, formula in enumerate(other.formulas):
+            self._admit(other.scores[i].item(), formula, other.fingerprints[i])
+
+    def rescore(self, score_fn):
+        """
+        Re-evaluate every member on the current data (e.g. after a data refresh,
+        when the old fingerprints no longer describe the new panel).
+        score_fn(formula) -> (score, signal) or None to drop the member.
+        """
+        old = self.formulas
+        self.formulas, self.scores = [], torch.empty(0)
+        self.fingerprints = torch.empty(0, self.sketch_dim)
+        self.shape = self._positions = None
+        for formula in old:
+            res = score_fn(formula)
+            if res is not None:
+                self.offer(res[0], formula, res[1])
+
+    def save(self, path=None):
+        atomic_json_dump(self.state_dict(), path or ModelConfig.ARCHIVE_PATH)
+
+    @classmethod
+    def load(cls, path=None):
+        archive = cls()
+        with open(path or ModelConfig.ARCHIVE_PATH, "r") as f:
+            archive.load_state_dict(json.load(f))
+        return archive
+
+    @classmethod
+    def load_or_new(cls, path=None):
+        path = path or ModelConfig.ARCHIVE_PATH
+        return cls.load(path) if os.path.exists(path) else cls()
@@ -0,0 +1,77 @@
+"""
+Actor / evaluator / learner overlap for AlphaEngine.
+
+The actor thread samples batch k+1 from a snapshot of the policy while a pool
+of evaluator threads runs the VM + backtest on batch k and the learner (the
+caller's thread) updates from batch k-1. VM and backtest are torch ops that
+release the GIL, so threads are enough to keep several cores busy.
+
+At most `max_staleness + 1` batches are sampled but not yet learned from, so a
+batch is always consumed within `max_staleness` policy updates of the version
+that sampled it; the learner corrects for that lag with importance weights
+against the stored behaviour log-probs.
+"""
+import copy
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ActorEvaluatorPipeline:
+    def __init__(self, engine, batch_size, max_staleness=1, eval_workers=2):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.max_staleness = max_staleness
+        self.version = 0  # learner updates applied so far
+
+        self.actor = copy.deepcopy(engine.model).eval()
+        self._actor_version = 0
+        self._slots = threading.Semaphore(max_staleness + 1)
+        self._batches = queue.Queue()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=eval_workers, thread_name_prefix='alpha-eval')
+        self._thread = threading.Thread(target=self._actor_loop, name='alpha-actor', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _actor_loop(self):
+        try:
+            while not self._stop.is_set():
+                if not self._slots.acquire(timeout=0.1):
+                    continue
+                if self._stop.is_set():
+                    break
+                with self.engine.weights_lock:
+                    if self._actor_version != self.version:
+                        self.actor.load_state_dict(self.engine.model.state_dict())
+                        self._actor_version = self.version
+                seqs, log_probs = self.engine._sample(self.batch_size, track_grad=False, model=self.actor)
+                fut = self._executor.submit(self.engine._evaluate, seqs)
+                self._batches.put((self._actor_version, seqs, log_probs, fut))
+        except BaseException as e:
+            self._batches.put(e)
+
+    def next_batch(self):
+        """Oldest in-flight batch once evaluated: (staleness, seqs, behaviour log_probs, rewards)."""
+        item = self._batches.get()
+        if isinstance(item, BaseException):
+            raise item
+        version, seqs, log_probs, fut = item
+        rewards = fut.result()
+        return self.version - version, seqs, log_probs, rewards
+
+    def updated(self):
+        """Call after each learner update (under engine.weights_lock); frees the batch's slot."""
+        self.version += 1
+        self._slots.release()
+
+    def close(self):
+        self._stop.set()
+        self._slots.release()
+        self._thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,5 +1,20 @@
 import torch
 
+
+def make_folds(n_steps, n_folds, scheme='blocks'):
+    """
+    (start, end) time ranges for fold-aware evaluation.
+    'blocks': n_folds contiguous, non-overlapping blocks (k-fold on the time axis).
+    'expanding': walk-forward windows [0, end_k) that grow by one block per fold.
+    """
+    edges = torch.linspace(0, n_steps, n_folds + 1).long().tolist()
+    if scheme == 'blocks':
+        return [(edges[i], edges[i + 1]) for i in range(n_folds)]
+    if scheme == 'expanding':
+        return [(0, edges[i + 1]) for i in range(n_folds)]
+    raise ValueError(f"Unknown fold scheme: {scheme}")
+
+
 class MemeBacktest:
     def __init__(self):
         self.trade_size = 1000.0
@@ -26,4 +41,64 @@ class MemeBacktest:
         activity = position.sum(dim=1)
         score = torch.where(activity < 5, torch.tensor(-10.0, device=score.device), score)
         final_fitness = torch.median(score)
-        return final_fitness, cum_ret.mean().item()
\ No newline at end of file
+        return final_fitness, cum_ret.mean().item()
+
+    def evaluate_folds(self, factors, raw_data, target_ret, folds, agg='mean'):
+        """
+        Score a batch of signals on several time folds in one pass.
+
+        factors: [F, tokens, time] (or [tokens, time]); folds: list of (start, end).
+        Each fold is scored as a separate backtest (flat position before its first
+        bar, same cost / drawdown / activity rules as evaluate), using segment sums
+        of cumulative PnL instead of re-slicing the panel per fold; folds may overlap.
+
+        Returns (fitness [F], fold_scores [F, folds], fold_ret [F, folds]), where
+        fitness aggregates fold_scores with agg in {'mean', 'min', 'median'}.
+        """
+        if factors.dim() == 2:
+            factors = factors.unsqueeze(0)
+        device = factors.device
+        T = factors.shape[-1]
+        starts = torch.tensor([a for a, _ in folds], device=device)
+        ends = torch.tensor([b for _, b in folds], device=device)
+
+        liquidity = raw_data['liquidity']
+        signal = torch.sigmoid(factors)
+        is_safe = (liquidity > self.min_liq).float()
+        position = (signal > 0.85).float() * is_safe                  # [F, N, T]
+        impact_slippage = torch.clamp(self.trade_size / (liquidity + 1e-9), 0.0, 0.05)
+        total_slippage_one_way = self.base_fee + impact_slippage
+        prev_pos = torch.roll(position, 1, dims=-1)
+        prev_pos[..., 0] = 0
+        turnover = torch.abs(position - prev_pos)
+        net_pnl = position * target_ret - turnover * total_slippage_one_way
+
+        def fold_sums(x):
+            # [..., T] -> [..., folds] via prefix sums: S[end] - S[start]
+            cs = torch.nn.functional.pad(torch.cumsum(x, dim=-1), (1, 0))
+            return cs[..., ends] - cs[..., starts]
+
+        cum_ret = fold_sums(net_pnl)                                    # [F, N, K]
+        big_drawdowns = fold_sums((net_pnl < -0.05).float())
+        activity = fold_sums(position)
+
+        # 每个 fold 从空仓开始: 只修正各 fold 首根 bar 的换手成本（按 fold 独立，可重叠）
+        s = starts.clamp(max=T - 1)
+        start_pnl = net_pnl[..., s]
+        fix = (position[..., s] - turnover[..., s]) * total_slippage_one_way[:, s]
+        cum_ret = cum_ret - fix
+        big_drawdowns = big_drawdowns + ((start_pnl - fix) < -0.05).float() - (start_pnl < -0.05).float()
+        score = cum_ret - big_drawdowns * 2.0
+        score = torch.where(activity < 5, torch.tensor(-10.0, device=device), score)
+
+        fold_scores = score.median(dim=1).values                       # [F, K]
+        fold_ret = cum_ret.mean(dim=1)
+        if agg == 'mean':
+            fitness = fold_scores.mean(dim=-1)
+        elif agg == 'min':
+            fitness = fold_scores.min(dim=-1).values
+        elif agg == 'median':
+            fitness = fold_scores.median(dim=-1).values
+        else:
+            raise ValueError(f"Unknown fold aggregation: {agg}")
+        return fitness, fold_scores, fold_ret
@@ -0,0 +1,83 @@
+"""
+Forward/backward time of AlphaGPT attention: nn.MultiheadAttention with a float
+causal mask (the previous path) vs CausalSelfAttention on scaled_dot_product_attention.
+
+    python -m model_core.bench_attention --batch 8192 --seq 13
+
+Also checks that MultiheadAttention weights converted with convert_legacy_attention
+reproduce the old outputs (QK-norm off), and times a full AlphaGPT step.
+"""
+import argparse
+import time
+import torch
+import torch.nn as nn
+from .alphagpt import AlphaGPT, CausalSelfAttention, convert_legacy_attention
+
+
+def _time(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch', type=int, default=8192)
+    parser.add_argument('--seq', type=int, default=13, help="MAX_FORMULA_LEN + 1")
+    parser.add_argument('--d-model', type=int, default=64)
+    parser.add_argument('--heads', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    B, T, D = args.batch, args.seq, args.d_model
+    x = torch.randn(B, T, D, requires_grad=True)
+
+    mha = nn.MultiheadAttention(D, args.heads, batch_first=True)
+    mask = nn.Transformer.generate_square_subsequent_mask(T)
+    sdpa = CausalSelfAttention(D, args.heads)
+    sdpa.load_state_dict(convert_legacy_attention(mha.state_dict()))
+
+    with torch.no_grad():
+        ref, _ = mha(x, x, x, attn_mask=mask, is_causal=True)
+        out = sdpa(x)
+    print(f"Converted weights max |diff|: {(ref - out).abs().max().item():.2e}")
+
+    def mha_fwd():
+        with torch.no_grad():
+            mha(x, x, x, attn_mask=mask, is_causal=True)
+
+    def sdpa_fwd():
+        with torch.no_grad():
+            sdpa(x)
+
+    def mha_fwd_bwd():
+        out, _ = mha(x, x, x, attn_mask=mask, is_causal=True)
+        out.sum().backward()
+
+    def sdpa_fwd_bwd():
+        sdpa(x).sum().backward()
+
+    print(f"Attention layer, batch {B} x seq {T} x d {D} (ms):")
+    print(f"  forward           MHA {_time(mha_fwd, args.repeat):8.1f}   SDPA {_time(sdpa_fwd, args.repeat):8.1f}")
+    print(f"  forward+backward  MHA {_time(mha_fwd_bwd, args.repeat):8.1f}   SDPA {_time(sdpa_fwd_bwd, args.repeat):8.1f}")
+
+    model = AlphaGPT()
+    idx = torch.randint(0, model.vocab_size, (B, T))
+
+    def model_fwd():
+        with torch.no_grad():
+            model(idx)
+
+    def model_fwd_bwd():
+        logits, value, _ = model.forward_all(idx)
+        (logits.sum() + value.sum()).backward()
+
+    print(f"AlphaGPT (2 layers x 3 loops), batch {B} x seq {T} (ms):")
+    print(f"  forward {_time(model_fwd, args.repeat):8.1f}   forward_all+backward {_time(model_fwd_bwd, args.repeat):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Eager vs compiled AlphaGPT: sampling and training throughput on CPU.
+
+    python -m model_core.bench_compile --batch 1024 --repeat 5
+
+Sampling = one full MAX_FORMULA_LEN autoregressive pass (no grad, as in PPO);
+training = forward_all + backward over the sampled batch (the PPO/off-policy update).
+Compilation time is reported separately from steady-state throughput.
+"""
+import argparse
+import time
+import torch
+from .synthetic import SyntheticDataLoader
+from .engine import AlphaEngine
+
+
+def _bench(eng, bs, repeat):
+    eng.model.eval()
+    t0 = time.perf_counter()
+    seqs, _ = eng._sample(bs, track_grad=False)
+    inp = eng._policy_inputs(seqs)
+    eng.model.train()
+    logits, values, _ = eng._forward_all(inp)
+    (logits.sum() + values.sum()).backward()
+    warmup = time.perf_counter() - t0
+
+    eng.model.eval()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        eng._sample(bs, track_grad=False)
+    sample_s = (time.perf_counter() - t0) / repeat
+
+    eng.model.train()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        logits, values, _ = eng._forward_all(inp)
+        (logits.sum() + values.sum()).backward()
+    train_s = (time.perf_counter() - t0) / repeat
+    return {'warmup_s': round(warmup, 2),
+            'sample_formulas_per_s': round(bs / sample_s, 1),
+            'train_formulas_per_s': round(bs / train_s, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch', type=int, default=1024)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    loader = SyntheticDataLoader(8, 200)
+    loader.load_data()
+    for compile_model in (False, True):
+        torch.manual_seed(0)
+        eng = AlphaEngine(use_lord_regularization=False, loader=loader, compile_model=compile_model)
+        r = _bench(eng, args.batch, args.repeat)
+        name = eng._policy().backend if compile_model else 'eager'
+        print(f"{name:12s} warmup={r['warmup_s']:7.2f}s  sample={r['sample_formulas_per_s']:10.1f} formulas/s  "
+              f"train={r['train_formulas_per_s']:10.1f} formulas/s")
+
+
+if __name__ == "__main__":
+    main()
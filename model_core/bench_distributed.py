@@ -0,0 +1,83 @@
+"""
+Scaling of data-parallel mining from 1 to N CPU processes on synthetic data.
+
+    python -m model_core.bench_distributed --max-procs 8 --steps 10 --batch 1024
+
+Spawns a gloo process group per world size (one thread per rank, as torchrun
+does) and reports steps/s, formula evaluations/s and speed-up over one process.
+"""
+import argparse
+import json
+import os
+import socket
+import time
+import torch
+import torch.multiprocessing as mp
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _worker(rank, world_size, port, args, queue):
+    os.environ.update(MASTER_ADDR='127.0.0.1', MASTER_PORT=str(port),
+                      RANK=str(rank), WORLD_SIZE=str(world_size))
+    torch.set_num_threads(1)
+    torch.manual_seed(args.seed)
+
+    from .synthetic import SyntheticDataLoader
+    from .engine import AlphaEngine
+    from . import distributed as ddp
+
+    loader = SyntheticDataLoader(args.tokens, args.bars, seed=args.seed)
+    loader.load_data()
+    eng = AlphaEngine(use_lord_regularization=not args.no_lord, loader=loader,
+                      update_mode=args.mode, distributed=True)
+    ddp.barrier()
+    t0 = time.perf_counter()
+    eng.train(steps=args.steps, batch_size=args.batch, save=False)
+    ddp.barrier()
+    wall = time.perf_counter() - t0
+    if rank == 0:
+        queue.put({'procs': world_size, 'wall_s': round(wall, 3),
+                   'steps_per_s': round(args.steps / wall, 3),
+                   'evals_per_s': round(eng.evaluations / wall, 1),
+                   'best_score': eng.best_score})
+    ddp.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-procs', type=int, default=os.cpu_count())
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--batch', type=int, default=1024)
+    parser.add_argument('--tokens', type=int, default=64)
+    parser.add_argument('--bars', type=int, default=2000)
+    parser.add_argument('--mode', choices=['reinforce', 'ppo'], default='reinforce')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-lord', action='store_true')
+    parser.add_argument('--out', type=str, default=None)
+    args = parser.parse_args()
+
+    sizes = sorted({1, *[n for n in (2, 4, 8, 16, 32, 64) if n < args.max_procs], args.max_procs})
+    ctx = mp.get_context('spawn')
+    results = []
+    for n in sizes:
+        queue = ctx.SimpleQueue()
+        mp.start_processes(_worker, args=(n, _free_port(), args, queue), nprocs=n,
+                           join=True, start_method='spawn')
+        r = queue.get()
+        r['speedup'] = round(r['steps_per_s'] / results[0]['steps_per_s'], 2) if results else 1.0
+        results.append(r)
+        print(f"procs={n:3d}  steps/s={r['steps_per_s']:8.3f}  evals/s={r['evals_per_s']:10.1f}  "
+              f"speedup={r['speedup']:5.2f}x")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Sample efficiency of AlphaEngine update modes on synthetic market data.
+
+    python -m model_core.bench_policy --steps 60 --batch 256 --out bench_policy.json
+
+Trains one engine per mode from the same seed and records best fitness against
+the number of VM + backtest evaluations; a plot is written if matplotlib is installed.
+"""
+import argparse
+import json
+import time
+import torch
+from .synthetic import SyntheticDataLoader
+from .engine import AlphaEngine
+
+
+def run_mode(mode, loader, args):
+    torch.manual_seed(args.seed)
+    eng = AlphaEngine(use_lord_regularization=not args.no_lord, loader=loader, update_mode=mode,
+                      ppo_epochs=args.ppo_epochs, ppo_minibatch=args.ppo_minibatch)
+    t0 = time.perf_counter()
+    eng.train(steps=args.steps, batch_size=args.batch, save=False)
+    return {
+        'evaluations': eng.training_history['evaluations'],
+        'best_score': eng.training_history['best_score'],
+        'avg_reward': eng.training_history['avg_reward'],
+        'final_best': eng.best_score,
+        'wall_s': round(time.perf_counter() - t0, 2),
+    }
+
+
+def evals_to_reach(curve, target):
+    for n, best in zip(curve['evaluations'], curve['best_score']):
+        if best >= target:
+            return n
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type=int, default=60)
+    parser.add_argument('--batch', type=int, default=256)
+    parser.add_argument('--tokens', type=int, default=64)
+    parser.add_argument('--bars', type=int, default=2000)
+    parser.add_argument('--ppo-epochs', type=int, default=4)
+    parser.add_argument('--ppo-minibatch', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-lord', action='store_true')
+    parser.add_argument('--out', type=str, default='bench_policy.json')
+    parser.add_argument('--plot', type=str, default='bench_policy.png')
+    args = parser.parse_args()
+
+    loader = SyntheticDataLoader(args.tokens, args.bars, seed=args.seed)
+    loader.load_data()
+
+    results = {mode: run_mode(mode, loader, args) for mode in ('reinforce', 'ppo')}
+
+    # 以 reinforce 的最终最优分为目标，比较两者达到该分数所需的评估次数
+    target = results['reinforce']['final_best']
+    for mode, r in results.items():
+        r['evals_to_reinforce_best'] = evals_to_reach(r, target)
+        print(f"{mode:10s} best={r['final_best']:.4f} evals_to_target={r['evals_to_reinforce_best']} "
+              f"wall={r['wall_s']}s")
+
+    with open(args.out, 'w') as f:
+        json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return
+    fig, ax = plt.subplots(figsize=(7, 4))
+    for mode, r in results.items():
+        ax.plot(r['evaluations'], r['best_score'], label=mode)
+    ax.set_xlabel('formula evaluations (VM + backtest)')
+    ax.set_ylabel('best fitness')
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(args.plot, dpi=120)
+    print(f"Plot saved to {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Timing suite for model_core hot paths on synthetic market data (no Postgres needed).
+
+    python -m model_core.bench_suite --out bench_suite.json
+    python -m model_core.bench_suite --baseline bench_suite.json --tolerance 0.15
+
+Each benchmark runs once to warm up, then `--repeat` times; the median wall time
+is compared against the baseline file and the process exits with status 1 if
+any benchmark got slower than baseline * (1 + tolerance).
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import torch
+from .config import ModelConfig
+from .factors import AdvancedFactorEngineer, FeatureEngineer
+from .ops import OPS_CONFIG
+from .synthetic import SyntheticDataLoader
+from .vm import StackVM
+from .backtest import MemeBacktest
+from .engine import AlphaEngine
+
+
+FEATURES = ['RET', 'LIQ', 'PRESSURE', 'FOMO', 'DEV', 'LOG_VOL']
+
+# 代表性公式：覆盖逐元素、时序 (DECAY/DELAY1/MAX3/JUMP) 和三元 GATE
+FORMULAS = {
+    'momentum': ['RET', 'DECAY'],
+    'pump_gate': ['PRESSURE', 'RET', 'NEG', 'DEV', 'GATE'],
+    'jump_liq': ['RET', 'JUMP', 'LIQ', 'MUL'],
+    'vol_ratio': ['FOMO', 'MAX3', 'LOG_VOL', 'DELAY1', 'DIV', 'SIGN'],
+    'deep': ['RET', 'DECAY', 'DEV', 'ABS', 'SUB', 'LOG_VOL', 'DELAY1', 'MUL', 'PRESSURE', 'ADD', 'MAX3'],
+}
+
+
+def encode(names):
+    tokens = {name: i for i, name in enumerate(FEATURES)}
+    tokens.update({cfg[0]: i + FeatureEngineer.INPUT_DIM for i, cfg in enumerate(OPS_CONFIG)})
+    return [tokens[n] for n in names]
+
+
+def timed(fn, repeat):
+    fn()  # warmup
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1e3)
+    return {'median_ms': round(statistics.median(runs), 3), 'min_ms': round(min(runs), 3), 'runs': len(runs)}
+
+
+def build_benchmarks(loader, args):
+    raw, feat, target = loader.raw_data_cache, loader.feat_tensor, loader.target_ret
+    vm, bt = StackVM(), MemeBacktest()
+    adv = AdvancedFactorEngineer()
+    formulas = {name: encode(f) for name, f in FORMULAS.items()}
+    signal = vm.execute(formulas['pump_gate'], feat)
+
+    torch.manual_seed(args.seed)
+    engine = AlphaEngine(use_lord_regularization=True, loader=loader, signal_cache=False)
+
+    def train_step():
+        engine.model.train()
+        seqs, log_probs = engine._sample(args.batch, track_grad=True)
+        engine._update_reinforce(log_probs, engine._evaluate(seqs))
+
+    def sample():
+        engine.model.eval()
+        with torch.no_grad():
+            engine._sample(args.batch, track_grad=False)
+
+    benches = {
+        'features.compute_features': lambda: FeatureEngineer.compute_features(raw),
+        'features.advanced': lambda: adv.compute_advanced_features(raw),
+        'backtest.evaluate': lambda: bt.evaluate(signal, raw, target),
+        'policy.sample': sample,
+        'engine.train_step': train_step,
+    }
+    for name, tokens in formulas.items():
+        benches[f'vm.{name}'] = lambda tokens=tokens: vm.execute(tokens, feat)
+    return benches
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'benchmark':28s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for name, r in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:28s} {'-':>10s} {r['median_ms']:10.3f} {'new':>8s}")
+            continue
+        change = r['median_ms'] / old['median_ms'] - 1
+        flag = ''
+        if change > tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:28s} {old['median_ms']:10.3f} {r['median_ms']:10.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tokens', type=int, default=64)
+    parser.add_argument('--bars', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=ModelConfig.BATCH_SIZE)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=None, help="torch.set_num_threads for stable numbers")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', type=str, nargs='*', default=None, help="Benchmark name prefixes to run")
+    parser.add_argument('--out', type=str, default='bench_suite.json')
+    parser.add_argument('--baseline', type=str, default=None, help="Earlier --out file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed slowdown vs baseline (0.15 = 15%)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    loader = SyntheticDataLoader(args.tokens, args.bars, seed=args.seed)
+    loader.load_data()
+
+    results = {}
+    for name, fn in build_benchmarks(loader, args).items():
+        if args.only and not any(name.startswith(p) for p in args.only):
+            continue
+        results[name] = timed(fn, args.repeat)
+        print(f"  {name:28s} {results[name]['median_ms']:10.3f} ms")
+
+    meta = {
+        'torch': torch.__version__, 'python': platform.python_version(), 'machine': platform.machine(),
+        'device': str(ModelConfig.DEVICE), 'threads': torch.get_num_threads(),
+        'tokens': args.tokens, 'bars': args.bars, 'batch': args.batch, 'repeat': args.repeat,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        diff = {k: (base['meta'].get(k), v) for k, v in meta.items() if base['meta'].get(k) != v}
+        if diff:
+            print(f"   Warning: baseline was recorded in a different setup: {diff}")
+        regressions = compare(results, base['results'], args.tolerance)
+
+    with open(args.out, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}: {regressions}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
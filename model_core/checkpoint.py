@@ -0,0 +1,66 @@
+import glob
+import json
+import os
+import re
+import tempfile
+import torch
+
+
+def _atomic_write(path, write_fn, mode='wb'):
+    """Write via a temp file in the same directory, fsync, then os.replace over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def atomic_torch_save(obj, path):
+    _atomic_write(path, lambda f: torch.save(obj, f))
+
+
+def atomic_json_dump(obj, path, **kwargs):
+    _atomic_write(path, lambda f: json.dump(obj, f, **kwargs), mode='w')
+
+
+def load_checkpoint(path, map_location=None):
+    return torch.load(path, map_location=map_location, weights_only=False)
+
+
+class CheckpointManager:
+    """
+    Rolling `ckpt_<step>.pt` files in one directory; only the newest `keep` are retained.
+    A crash mid-write never leaves a truncated checkpoint behind.
+    """
+    PATTERN = re.compile(r'ckpt_(\d+)\.pt$')
+
+    def __init__(self, directory, keep=3):
+        self.directory = directory
+        self.keep = keep
+
+    def _list(self):
+        found = []
+        for p in glob.glob(os.path.join(self.directory, 'ckpt_*.pt')):
+            m = self.PATTERN.search(p)
+            if m:
+                found.append((int(m.group(1)), p))
+        return sorted(found)
+
+    def save(self, step, state):
+        path = os.path.join(self.directory, f'ckpt_{step:07d}.pt')
+        atomic_torch_save(state, path)
+        for _, old in self._list()[:-self.keep]:
+            os.remove(old)
+        return path
+
+    def latest(self):
+        found = self._list()
+        return found[-1][1] if found else None
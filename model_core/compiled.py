@@ -0,0 +1,75 @@
+"""
+Optional compiled execution of AlphaGPT's sampling step and full-sequence pass.
+
+torch.compile (inductor, CPU C++ codegen) is tried first with dynamic=False;
+sampling goes through AlphaGPT.forward_step on a fixed-length token buffer read
+in a few power-of-two length buckets, so a batch size compiles a handful of
+graphs once instead of recompiling for every prefix length. If inductor is
+unavailable (no compiler, old torch) no-grad sampling falls back to a
+TorchScript trace, and everything else runs eagerly.
+"""
+import torch
+from .config import ModelConfig
+
+
+# 每个 (batch, bucket, train/eval) 组合各编译一次；pipeline 的 actor 副本另计
+RECOMPILE_LIMIT = 64
+
+
+def _raise_recompile_limit(limit):
+    import torch._dynamo
+    cfg = torch._dynamo.config
+    for name in ('recompile_limit', 'cache_size_limit'):
+        if hasattr(cfg, name):
+            setattr(cfg, name, max(getattr(cfg, name), limit))
+            return
+
+
+def sample_buckets(max_len):
+    """Power-of-two prefix widths capped at max_len, e.g. 13 -> [2, 4, 8, 13]."""
+    buckets = []
+    width = 2
+    while width < max_len:
+        buckets.append(width)
+        width *= 2
+    return buckets + [max_len]
+
+
+class CompiledPolicy:
+    def __init__(self, model, backend='inductor', mode=None):
+        self.model = model
+        self.backend = 'eager'
+        self._step = model.forward_step
+        self._all = model.forward_all
+        self._traced_step = None
+
+        buf = torch.zeros((2, ModelConfig.MAX_FORMULA_LEN + 1), dtype=torch.long, device=ModelConfig.DEVICE)
+        pos = torch.zeros(1, dtype=torch.long, device=ModelConfig.DEVICE)
+        try:
+            _raise_recompile_limit(RECOMPILE_LIMIT)
+            step = torch.compile(model.forward_step, backend=backend, mode=mode, dynamic=False)
+            all_ = torch.compile(model.forward_all, backend=backend, mode=mode, dynamic=False)
+            # 编译是惰性的，先跑一次小 batch 确认工具链可用
+            with torch.no_grad():
+                step(buf, pos)
+            self._step, self._all, self.backend = step, all_, backend
+        except Exception as e:
+            print(f"   torch.compile unavailable ({type(e).__name__}: {e}); trying TorchScript")
+            try:
+                was_training = model.training
+                model.eval()
+                with torch.no_grad():
+                    self._traced_step = torch.jit.trace_module(model, {'forward_step': (buf, pos)}, check_trace=False)
+                model.train(was_training)
+                self.backend = 'torchscript'
+            except Exception as e:
+                print(f"   TorchScript trace failed ({type(e).__name__}: {e}); running eagerly")
+
+    def step(self, buf, pos):
+        # trace 固化了 eval 模式且不记录梯度，只用于无梯度采样
+        if self._traced_step is not None and not torch.is_grad_enabled() and not self.model.training:
+            return self._traced_step.forward_step(buf, pos)
+        return self._step(buf, pos)
+
+    def forward_all(self, idx):
+        return self._all(idx)
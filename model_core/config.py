@@ -10,4 +10,19 @@ class ModelConfig:
     TRADE_SIZE_USD = 1000.0
     MIN_LIQUIDITY = 5000.0 # 低于此流动性视为归零/无法交易
     BASE_FEE = 0.005 # 基础费率 0.5% (Swap + Gas + Jito Tip)
-    INPUT_DIM = 6
\ No newline at end of file
+    INPUT_DIM = 6
+    LORD_EVERY = 1 # 每 k 步做一次 LoRD，强度乘以 k
+    CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "checkpoints")
+    CHECKPOINT_EVERY = 50 # 每 N 步写一次断点
+    CHECKPOINT_KEEP = 3
+    PIPELINE_MAX_STALENESS = 1 # 异步流水线中样本最多落后的策略版本数
+    PIPELINE_EVAL_WORKERS = 2
+    ARCHIVE_PATH = "alpha_archive.json"
+    ARCHIVE_SIZE = 32
+    ARCHIVE_CORR_THRESHOLD = 0.9 # 与已有成员 |corr| 超过该值视为重复因子
+    ARCHIVE_SKETCH_DIM = 4096
+    SIGNAL_CACHE_SIZE = 200000 # 回测结果缓存条目上限 (LRU)
+    SIGNAL_CACHE_SAMPLE = 512
+    BACKTEST_FOLDS = 0 # >0 时按时间切分 fold 评估，抑制样本内过拟合
+    FOLD_SCHEME = 'blocks' # 'blocks' | 'expanding'
+    FOLD_AGG = 'mean' # 'mean' | 'min' | 'median'
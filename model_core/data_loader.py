@@ -31,7 +31,7 @@ class CryptoDataLoader:
             pivot = df.pivot(index='time', columns='address', values=col)
             pivot = pivot.fillna(method='ffill').fillna(0.0)
             return torch.tensor(pivot.values.T, dtype=torch.float32, device=ModelConfig.DEVICE)
-        self.raw_data_cache = {
+        self._build_tensors({
             'open': to_tensor('open'),
             'high': to_tensor('high'),
             'low': to_tensor('low'),
@@ -39,7 +39,10 @@ class CryptoDataLoader:
             'volume': to_tensor('volume'),
             'liquidity': to_tensor('liquidity'),
             'fdv': to_tensor('fdv')
-        }
+        })
+
+    def _build_tensors(self, raw_data):
+        self.raw_data_cache = raw_data
         self.feat_tensor = FeatureEngineer.compute_features(self.raw_data_cache)
         op = self.raw_data_cache['open']
         t1 = torch.roll(op, -1, dims=1)
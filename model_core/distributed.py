@@ -0,0 +1,83 @@
+"""
+Data-parallel helpers for multi-process mining over torch.distributed (gloo, CPU).
+
+Launch one process per core, on one box or several:
+
+    torchrun --nproc_per_node=8 -m model_core.engine --distributed
+    torchrun --nnodes=2 --node_rank=0 --nproc_per_node=8 \
+        --master_addr=10.0.0.1 --master_port=29500 -m model_core.engine --distributed
+
+Every rank holds an identical model replica; gradients are averaged with
+all_reduce so optimizer and LoRD steps stay bit-identical across ranks.
+"""
+import os
+import torch
+import torch.distributed as dist
+
+
+def init_distributed(backend='gloo'):
+    """Join the process group described by torchrun's env vars. Returns (rank, world_size)."""
+    if not dist.is_initialized():
+        dist.init_process_group(backend=backend)
+    return dist.get_rank(), dist.get_world_size()
+
+
+def is_distributed():
+    return dist.is_available() and dist.is_initialized()
+
+
+def launched_by_torchrun():
+    return 'RANK' in os.environ and 'WORLD_SIZE' in os.environ
+
+
+def broadcast_model(model, src=0):
+    for t in list(model.parameters()) + list(model.buffers()):
+        dist.broadcast(t.data, src=src)
+
+
+def all_reduce_grads(model):
+    """Average gradients over ranks, one flat buffer instead of one call per tensor."""
+    params = [p for p in model.parameters() if p.grad is not None]
+    if not params:
+        return
+    flat = torch.cat([p.grad.reshape(-1) for p in params])
+    dist.all_reduce(flat)
+    flat /= dist.get_world_size()
+    offset = 0
+    for p in params:
+        n = p.grad.numel()
+        p.grad.copy_(flat[offset:offset + n].view_as(p.grad))
+        offset += n
+
+
+def global_mean_std(x):
+    """Mean and (unbiased) std of x concatenated across all ranks."""
+    stats = torch.stack([x.sum(), (x * x).sum(), torch.tensor(float(x.numel()), device=x.device)])
+    dist.all_reduce(stats)
+    s, sq, n = stats.tolist()
+    mean = s / n
+    var = max(sq - n * mean * mean, 0.0) / max(n - 1, 1)
+    return mean, var ** 0.5
+
+
+def sync_best(score, formula):
+    """Every rank adopts the highest (score, formula) seen by any rank."""
+    gathered = [None] * dist.get_world_size()
+    dist.all_gather_object(gathered, (score, formula))
+    return max(gathered, key=lambda sf: sf[0])
+
+
+def gather_objects(obj):
+    gathered = [None] * dist.get_world_size()
+    dist.all_gather_object(gathered, obj)
+    return gathered
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def cleanup():
+    if is_distributed():
+        dist.destroy_process_group()
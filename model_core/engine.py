@@ -1,16 +1,31 @@
 import torch
+import torch.nn.functional as F
 from torch.distributions import Categorical
 from tqdm import tqdm
-import json
+import os
+import threading
+from contextlib import nullcontext
 
 from .config import ModelConfig
 from .data_loader import CryptoDataLoader
 from .alphagpt import AlphaGPT, NewtonSchulzLowRankDecay, StableRankMonitor
 from .vm import StackVM
-from .backtest import MemeBacktest
+from .backtest import MemeBacktest, make_folds
+from .checkpoint import CheckpointManager, atomic_json_dump, load_checkpoint
+from . import distributed as ddp
+from .async_pipeline import ActorEvaluatorPipeline
+from .compiled import CompiledPolicy, sample_buckets
+from .archive import FormulaArchive
+from .signal_cache import SignalCache
+from .profiling import PhaseTimer, StepProfiler
 
 class AlphaEngine:
-    def __init__(self, use_lord_regularization=True, lord_decay_rate=1e-3, lord_num_iterations=5):
+    def __init__(self, use_lord_regularization=True, lord_decay_rate=1e-3, lord_num_iterations=5, lord_every=None,
+                 loader=None, update_mode='reinforce', ppo_epochs=4, ppo_minibatch=1024,
+                 clip=0.2, value_coef=0.5, entropy_coef=0.01, gae_lambda=0.95, distributed=False,
+                 pipeline=False, max_staleness=1, eval_workers=2, is_clip=1.0, compile_model=False,
+                 signal_cache=True, cache_verify=False, folds=None, fold_scheme=None, fold_agg=None,
+                 profile_ops=False, profile_steps=None, profile_dir='profiles'):
         """
         Initialize AlphaGPT training engine.
         
@@ -18,11 +33,53 @@ class AlphaEngine:
             use_lord_regularization: Enable Low-Rank Decay (LoRD) regularization
             lord_decay_rate: Strength of LoRD regularization
             lord_num_iterations: Number of Newton-Schulz iterations per step
+            lord_every: Apply LoRD every k steps with k times the rate (default ModelConfig.LORD_EVERY)
+            loader: Pre-built data loader (default: CryptoDataLoader from Postgres)
+            update_mode: 'reinforce' (batch-mean baseline) or 'ppo' (actor-critic with
+                the critic head as baseline, GAE advantages, clipped minibatch epochs)
+            ppo_epochs: Optimisation passes over each batch of evaluated formulas
+            ppo_minibatch: Formulas per PPO minibatch
+            clip: PPO ratio clip range
+            value_coef: Weight of the critic's value loss
+            entropy_coef: Weight of the entropy bonus
+            gae_lambda: GAE lambda (gamma is 1, reward arrives at the last token)
+            distributed: Data-parallel over torch.distributed (gloo); each rank samples and
+                evaluates BATCH_SIZE / world_size formulas, see model_core/distributed.py
+            pipeline: Overlap sampling, evaluation and updates (model_core/async_pipeline.py)
+            max_staleness: Max policy updates between sampling a batch and learning from it
+            eval_workers: Evaluator threads in pipeline mode
+            is_clip: Truncation of the per-formula importance weight in pipelined REINFORCE
+            compile_model: Run sampling and full-sequence passes through torch.compile
+                (TorchScript / eager fallback), see model_core/compiled.py
+            signal_cache: Reuse backtest results for formulas whose VM output fingerprint
+                was already scored (model_core/signal_cache.py)
+            cache_verify: Check cache hits for exact signal equality (collision check mode)
+            folds: Score on this many time folds instead of the whole panel (0 = off)
+            fold_scheme: 'blocks' (k-fold) or 'expanding' (walk-forward), see make_folds
+            fold_agg: Fitness over fold scores: 'mean', 'min' or 'median'
+            profile_ops: Time every StackVM op and report a per-op histogram
+            profile_steps: Steps to trace with torch.profiler (Chrome trace per step)
+            profile_dir: Where the Chrome traces are written
         """
-        self.loader = CryptoDataLoader()
-        self.loader.load_data()
+        if update_mode not in ('reinforce', 'ppo'):
+            raise ValueError(f"Unknown update_mode: {update_mode}")
+        if pipeline and distributed:
+            raise ValueError("pipeline mode is single-process; use distributed or pipeline, not both")
+
+        if loader is None:
+            loader = CryptoDataLoader()
+            loader.load_data()
+        self.loader = loader
         
         self.model = AlphaGPT().to(ModelConfig.DEVICE)
+
+        self.rank, self.world_size = 0, 1
+        if distributed:
+            self.rank, self.world_size = ddp.init_distributed()
+            ddp.broadcast_model(self.model)
+            # 参数已同步，采样随机数按 rank 错开
+            torch.manual_seed(torch.initial_seed() + self.rank)
+        self.is_main = self.rank == 0
         
         # Standard optimizer
         self.opt = torch.optim.AdamW(self.model.parameters(), lr=1e-3)
@@ -34,124 +91,551 @@ class AlphaEngine:
                 self.model.named_parameters(),
                 decay_rate=lord_decay_rate,
                 num_iterations=lord_num_iterations,
+                every=lord_every or ModelConfig.LORD_EVERY,
                 target_keywords=["q_proj", "k_proj", "attention", "qk_norm"]
             )
             self.rank_monitor = StableRankMonitor(
                 self.model,
-                target_keywords=["q_proj", "k_proj"]
+                target_keywords=["q_proj", "k_proj", "qkv"]
             )
         else:
             self.lord_opt = None
             self.rank_monitor = None
+
+        self.update_mode = update_mode
+        self.ppo_epochs = ppo_epochs
+        self.ppo_minibatch = ppo_minibatch
+        self.clip = clip
+        self.value_coef = value_coef
+        self.entropy_coef = entropy_coef
+        self.gae_lambda = gae_lambda
+
+        self.pipeline = pipeline
+        self.max_staleness = max_staleness
+        self.eval_workers = eval_workers
+        self.is_clip = is_clip
+
+        self.compile_model = compile_model
+        self._compiled = {}  # id(model) -> CompiledPolicy; the pipeline actor gets its own
+        # 流水线模式下 actor 线程读取权重、evaluator 线程更新 best，需要加锁
+        self.weights_lock = threading.Lock()
+        self._best_lock = threading.Lock()
+
+        # 多样性名人堂：相关性过高的因子只保留分数更高的一个
+        self.archive = FormulaArchive()
+        self.signal_cache = SignalCache(verify=cache_verify) if signal_cache else None
         
         self.vm = StackVM()
+        if profile_ops:
+            self.vm.enable_op_profile()
         self.bt = MemeBacktest()
+        # 每步各阶段耗时 (sample / vm / backtest / forward / backward / optim / lord ...)
+        self.timer = PhaseTimer()
+        self.step_profiler = StepProfiler(profile_steps, profile_dir)
+        n_folds = folds if folds is not None else ModelConfig.BACKTEST_FOLDS
+        self.folds = make_folds(self.loader.target_ret.shape[1], n_folds,
+                                fold_scheme or ModelConfig.FOLD_SCHEME) if n_folds else None
+        self.fold_agg = fold_agg or ModelConfig.FOLD_AGG
         
         self.best_score = -float('inf')
         self.best_formula = None
+        self.evaluations = 0
+        self.start_step = 0
         self.training_history = {
             'step': [],
             'avg_reward': [],
             'best_score': [],
+            'evaluations': [],
             'stable_rank': []
         }
 
-    def train(self):
-        print("🚀 Starting Meme Alpha Mining with LoRD Regularization..." if self.use_lord else "🚀 Starting Meme Alpha Mining...")
-        if self.use_lord:
-            print(f"   LoRD Regularization enabled")
-            print(f"   Target keywords: ['q_proj', 'k_proj', 'attention', 'qk_norm']")
+    def state_dict(self):
+        """Everything needed to continue a run bit-for-bit from the next step."""
+        rng = {'torch': torch.get_rng_state()}
+        if torch.cuda.is_available():
+            rng['cuda'] = torch.cuda.get_rng_state_all()
+        if self.world_size > 1:
+            rng = ddp.gather_objects(rng)  # per-rank list; collective, call on every rank
+        return {
+            'step': self.start_step,
+            'update_mode': self.update_mode,
+            'model': self.model.state_dict(),
+            'opt': self.opt.state_dict(),
+            'lord': self.lord_opt.state_dict() if self.use_lord else None,
+            'rank_monitor': self.rank_monitor.state_dict() if self.use_lord else None,
+            'rng': rng,
+            'best_score': self.best_score,
+            'best_formula': self.best_formula,
+            'archive': self.archive.state_dict(),
+            'evaluations': self.evaluations,
+            'training_history': self.training_history,
+        }
+
+    def load_state_dict(self, state):
+        self.model.load_state_dict(state['model'])
+        self.opt.load_state_dict(state['opt'])
+        if self.use_lord and state.get('lord'):
+            self.lord_opt.load_state_dict(state['lord'])
+            self.rank_monitor.load_state_dict(state['rank_monitor'])
+        rng = state['rng']
+        if isinstance(rng, list):
+            rng = rng[self.rank] if len(rng) == self.world_size else rng[0]
+        torch.set_rng_state(rng['torch'].cpu())
+        if torch.cuda.is_available() and 'cuda' in rng:
+            torch.cuda.set_rng_state_all(rng['cuda'])
+        self.start_step = state['step']
+        self.best_score = state['best_score']
+        self.best_formula = state['best_formula']
+        self.evaluations = state['evaluations']
+        self.training_history = state['training_history']
+        if state.get('archive'):
+            self.archive.load_state_dict(state['archive'])
+
+    def resume(self, path):
+        """Continue an interrupted run; path is a checkpoint file or a checkpoint directory."""
+        if os.path.isdir(path):
+            path = CheckpointManager(path).latest()
+            if path is None:
+                print(f"   No checkpoint found, starting from scratch")
+                return
+        self.load_state_dict(load_checkpoint(path, map_location=ModelConfig.DEVICE))
+        print(f"   Resumed from {path} at step {self.start_step}")
+        # 数据重新加载后面板形状变了 (新 K 线/新 token)，旧指纹无法比较，按当前数据重算
+        shape = (self.loader.feat_tensor.shape[0], self.loader.feat_tensor.shape[2])
+        old_shape = self.archive.shape
+        if old_shape is not None and tuple(old_shape) != shape:
+            self.archive.rescore(self._score_formula)
+            print(f"   Data shape changed {tuple(old_shape)} -> {shape}: "
+                  f"archive re-scored, {len(self.archive)} formulas kept")
+
+    def warm_start(self, path):
+        """
+        Start a new run (fresh optimizer, step 0) from a previous run's policy weights.
+        The previous best formula and archive are re-scored on the current data so
+        the new run only replaces them with formulas that are better on refreshed data.
+        """
+        if os.path.isdir(path):
+            path = CheckpointManager(path).latest()
+        state = load_checkpoint(path, map_location=ModelConfig.DEVICE)
+        self.model.load_state_dict(state['model'])
+        print(f"   Warm-started policy from {path}")
+        if state.get('best_formula'):
+            self._evaluate(torch.tensor([state['best_formula']], device=ModelConfig.DEVICE))
+        if state.get('archive'):
+            self.archive.load_state_dict(state['archive'])
+            self.archive.rescore(self._score_formula)
+            print(f"   Archive re-scored: {len(self.archive)} formulas kept")
+
+    def _policy(self, model=None):
+        model = model or self.model
+        if not self.compile_model:
+            return None
+        policy = self._compiled.get(id(model))
+        if policy is None:
+            policy = self._compiled[id(model)] = CompiledPolicy(model)
+            print(f"   Policy backend: {policy.backend}")
+        return policy
+
+    def _forward_all(self, idx):
+        policy = self._policy()
+        return policy.forward_all(idx) if policy else self.model.forward_all(idx)
+
+    def _sample(self, bs, track_grad, model=None):
+        """
+        Autoregressively sample bs formulas. Returns (seqs [B, L], log_probs [B, L]);
+        log_probs carry gradients only when track_grad is set.
+        """
+        with self.timer.phase('sample'):
+            return self._sample_impl(bs, track_grad, model or self.model)
+
+    def _sample_impl(self, bs, track_grad, model):
+        policy = self._policy(model)
+        if policy is not None:
+            return self._sample_fixed(bs, track_grad, policy)
+        inp = torch.zeros((bs, 1), dtype=torch.long, device=ModelConfig.DEVICE)
         
-        pbar = tqdm(range(ModelConfig.TRAIN_STEPS))
+        log_probs = []
+        tokens_list = []
         
-        for step in pbar:
-            bs = ModelConfig.BATCH_SIZE
-            inp = torch.zeros((bs, 1), dtype=torch.long, device=ModelConfig.DEVICE)
-            
-            log_probs = []
-            tokens_list = []
-            
+        with torch.set_grad_enabled(track_grad):
             for _ in range(ModelConfig.MAX_FORMULA_LEN):
-                logits, _, _ = self.model(inp)
+                logits, _, _ = model(inp)
                 dist = Categorical(logits=logits)
                 action = dist.sample()
                 
                 log_probs.append(dist.log_prob(action))
                 tokens_list.append(action)
                 inp = torch.cat([inp, action.unsqueeze(1)], dim=1)
-            
-            seqs = torch.stack(tokens_list, dim=1)
-            
-            rewards = torch.zeros(bs, device=ModelConfig.DEVICE)
-            
-            for i in range(bs):
-                formula = seqs[i].tolist()
+        
+        return torch.stack(tokens_list, dim=1), torch.stack(log_probs, dim=1)
+
+    def _sample_fixed(self, bs, track_grad, policy):
+        """
+        _sample over a fixed [B, L+1] buffer read through a few power-of-two length
+        buckets: causal attention hides the not-yet-written tail from position t, and
+        a compiled policy only ever sees len(buckets) input shapes.
+        """
+        L = ModelConfig.MAX_FORMULA_LEN
+        buf = torch.zeros((bs, L + 1), dtype=torch.long, device=ModelConfig.DEVICE)
+        cols = torch.arange(L + 1, device=ModelConfig.DEVICE)
+        positions = [cols[t:t + 1].clone() for t in range(L)]
+        buckets = sample_buckets(L + 1)
+        
+        log_probs = []
+        tokens_list = []
+        
+        with torch.set_grad_enabled(track_grad):
+            for t in range(L):
+                width = next(b for b in buckets if b > t)
+                logits, _, _ = policy.step(buf[:, :width].contiguous(), positions[t])
+                dist = Categorical(logits=logits)
+                action = dist.sample()
                 
+                log_probs.append(dist.log_prob(action))
+                tokens_list.append(action)
+                # 非原地写入：embedding 反向需要保留之前的 buf
+                buf = torch.where(cols == t + 1, action.unsqueeze(1), buf)
+        
+        return torch.stack(tokens_list, dim=1), torch.stack(log_probs, dim=1)
+
+    def _evaluate(self, seqs):
+        """Run every formula through the VM + backtest; the expensive part of a step."""
+        bs = seqs.shape[0]
+        rewards = torch.zeros(bs, device=ModelConfig.DEVICE)
+        
+        with self._best_lock:
+            self.evaluations += bs * self.world_size  # equal shards: global count
+        
+        for i, formula in enumerate(seqs.tolist()):
+            with self.timer.phase('vm'):
                 res = self.vm.execute(formula, self.loader.feat_tensor)
-                
-                if res is None:
-                    rewards[i] = -5.0
-                    continue
-                
-                if res.std() < 1e-4:
-                    rewards[i] = -2.0
-                    continue
-                
-                score, ret_val = self.bt.evaluate(res, self.loader.raw_data_cache, self.loader.target_ret)
-                rewards[i] = score
-                
-                if score.item() > self.best_score:
-                    self.best_score = score.item()
-                    self.best_formula = formula
-                    tqdm.write(f"[!] New King: Score {score:.2f} | Ret {ret_val:.2%} | Formula {formula}")
             
-            # Normalize rewards
-            adv = (rewards - rewards.mean()) / (rewards.std() + 1e-5)
+            if res is None:
+                rewards[i] = -5.0
+                continue
             
-            loss = 0
-            for t in range(len(log_probs)):
-                loss += -log_probs[t] * adv
+            if res.std() < 1e-4:
+                rewards[i] = -2.0
+                continue
             
-            loss = loss.mean()
+            score_val, ret_val = self._backtest(res)
+            rewards[i] = score_val
             
-            # Gradient step
-            self.opt.zero_grad()
+            with self._best_lock:
+                self.archive.offer(score_val, formula, res)
+                new_king = score_val > self.best_score
+                if new_king:
+                    self.best_score = score_val
+                    self.best_formula = formula
+            if new_king and self.is_main:
+                tqdm.write(f"[!] New King: Score {score_val:.2f} | Ret {ret_val:.2%} | Formula {formula}")
+        
+        return rewards
+
+    def _score_formula(self, formula):
+        """(score, signal) of one formula on the current data, or None if it is invalid/flat."""
+        with self.timer.phase('vm'):
+            res = self.vm.execute(formula, self.loader.feat_tensor)
+        if res is None or res.std() < 1e-4:
+            return None
+        return self._backtest(res)[0], res
+
+    def _backtest(self, res):
+        """(score, mean return) of a signal, served from the fingerprint cache when possible."""
+        with self.timer.phase('backtest'):
+            return self._backtest_impl(res)
+
+    def _backtest_impl(self, res):
+        key = None
+        if self.signal_cache is not None:
+            key, cached = self.signal_cache.get(res)
+            if cached is not None:
+                return cached
+        if self.folds:
+            fitness, _, fold_ret = self.bt.evaluate_folds(res, self.loader.raw_data_cache, self.loader.target_ret,
+                                                          self.folds, self.fold_agg)
+            result = (fitness[0].item(), fold_ret[0].mean().item())
+        else:
+            score, ret_val = self.bt.evaluate(res, self.loader.raw_data_cache, self.loader.target_ret)
+            result = (score.item(), ret_val)
+        if key is not None:
+            self.signal_cache.put(key, result, res)
+        return result
+
+    def _sync_best(self):
+        local_best = self.best_score
+        self.best_score, self.best_formula = ddp.sync_best(self.best_score, self.best_formula)
+        if self.is_main and self.best_score > local_best:
+            tqdm.write(f"[!] New King (other rank): Score {self.best_score:.2f} | Formula {self.best_formula}")
+
+    def _normalize(self, x):
+        if self.world_size > 1:
+            mean, std = ddp.global_mean_std(x)
+            return (x - mean) / (std + 1e-5)
+        return (x - x.mean()) / (x.std() + 1e-5)
+
+    def _backward(self, loss):
+        self.opt.zero_grad()
+        with self.timer.phase('backward'):
             loss.backward()
-            self.opt.step()
+
+    def _apply_grads(self, max_grad_norm=None):
+        if self.world_size > 1:
+            with self.timer.phase('allreduce'):
+                ddp.all_reduce_grads(self.model)
+        with self.weights_lock:
+            with self.timer.phase('optim'):
+                if max_grad_norm:
+                    torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_grad_norm)
+                self.opt.step()
             
-            # Apply Low-Rank Decay regularization
+            # Apply Low-Rank Decay regularization (identical params on every rank)
             if self.use_lord:
-                self.lord_opt.step()
-            
-            # Logging
-            avg_reward = rewards.mean().item()
-            postfix_dict = {'AvgRew': f"{avg_reward:.3f}", 'BestScore': f"{self.best_score:.3f}"}
-            
-            if self.use_lord and step % 100 == 0:
-                stable_rank = self.rank_monitor.compute()
-                postfix_dict['Rank'] = f"{stable_rank:.2f}"
-                self.training_history['stable_rank'].append(stable_rank)
-            
-            self.training_history['step'].append(step)
-            self.training_history['avg_reward'].append(avg_reward)
-            self.training_history['best_score'].append(self.best_score)
-            
-            pbar.set_postfix(postfix_dict)
+                with self.timer.phase('lord'):
+                    self.lord_opt.step()
 
-        # Save best formula
-        with open("best_meme_strategy.json", "w") as f:
-            json.dump(self.best_formula, f)
+    def _update_reinforce(self, log_probs, rewards):
+        # Normalize rewards
+        adv = self._normalize(rewards)
         
-        # Save training history
-        import json as js
-        with open("training_history.json", "w") as f:
-            js.dump(self.training_history, f)
+        loss = (-log_probs * adv.unsqueeze(1)).sum(dim=1).mean()
+        
+        # Gradient step
+        self._backward(loss)
+        self._apply_grads()
+
+    def _policy_inputs(self, seqs):
+        # 位置 t 的输入是 [BOS, a_0..a_{t-1}]，一次前向即可得到所有步的 logits/value
+        B = seqs.shape[0]
+        return torch.cat([torch.zeros((B, 1), dtype=torch.long, device=seqs.device), seqs[:, :-1]], dim=1)
+
+    def _update_reinforce_offpolicy(self, seqs, old_log_probs, rewards):
+        """
+        REINFORCE on a batch sampled by a slightly stale policy: the per-formula
+        importance weight pi/mu is truncated at is_clip (as in V-trace) so that a
+        lagging actor cannot blow up the update. pi is evaluated with dropout off,
+        like the actor's mu, so the weight carries no dropout noise; the
+        train-mode pass below only supplies the gradient.
+        """
+        adv = self._normalize(rewards)
+        inp = self._policy_inputs(seqs)
+        with torch.no_grad(), self.timer.phase('forward'):
+            logits, _, _ = self._forward_all(inp)
+            pi = Categorical(logits=logits).log_prob(seqs).sum(dim=1)
+            w = torch.exp(pi - old_log_probs.sum(dim=1)).clamp(max=self.is_clip)
+        
+        self.model.train()
+        with self.timer.phase('forward'):
+            logits, _, _ = self._forward_all(inp)
+        log_probs = Categorical(logits=logits).log_prob(seqs).sum(dim=1)
+        loss = -(w * adv * log_probs).mean()
+        
+        self._backward(loss)
+        self._apply_grads()
+
+    def _gae(self, values, rewards):
+        """
+        GAE over a formula with gamma=1 and a single terminal reward.
+        values: [B, L] critic estimates before each action. Returns (advantages, returns).
+        """
+        B, L = values.shape
+        next_values = torch.cat([values[:, 1:], torch.zeros(B, 1, device=values.device)], dim=1)
+        deltas = next_values - values
+        deltas[:, -1] += rewards
+        
+        adv = torch.zeros_like(values)
+        running = torch.zeros(B, device=values.device)
+        for t in reversed(range(L)):
+            running = deltas[:, t] + self.gae_lambda * running
+            adv[:, t] = running
+        return adv, adv + values
+
+    def _update_ppo(self, seqs, old_log_probs, rewards):
+        B = seqs.shape[0]
+        inp = self._policy_inputs(seqs)
+        # 全程关闭 dropout：mu 在 eval 下采样，首个 epoch 的 ratio 必须恰为 1，
+        # 否则裁剪由 dropout 噪声而非策略变化触发
+        self.model.eval()
+        
+        with torch.no_grad(), self.timer.phase('forward'):
+            _, values, _ = self._forward_all(inp)
+            adv, returns = self._gae(values, rewards)
+            adv = self._normalize(adv)
+        
+        # ppo_minibatch 为全局大小，按 rank 均分
+        mb = max(1, min(self.ppo_minibatch // self.world_size, B))
+        for _ in range(self.ppo_epochs):
+            perm = torch.randperm(B, device=seqs.device)
+            for lo in range(0, B, mb):
+                idx = perm[lo:lo + mb]
+                with self.timer.phase('forward'):
+                    logits, values, _ = self._forward_all(inp[idx])
+                dist = Categorical(logits=logits)
+                log_probs = dist.log_prob(seqs[idx])
+                
+                ratio = torch.exp(log_probs - old_log_probs[idx])
+                surr = torch.min(ratio * adv[idx],
+                                 torch.clamp(ratio, 1 - self.clip, 1 + self.clip) * adv[idx])
+                policy_loss = -surr.mean()
+                value_loss = F.mse_loss(values, returns[idx])
+                entropy = dist.entropy().mean()
+                loss = policy_loss + self.value_coef * value_loss - self.entropy_coef * entropy
+                
+                self._backward(loss)
+                self._apply_grads(max_grad_norm=1.0)
+
+    def train(self, steps=None, batch_size=None, save=True, checkpoint_dir=None, checkpoint_every=None):
+        if not self.is_main:
+            return self._train_loop(steps, batch_size, False, checkpoint_dir, checkpoint_every)
+        print("🚀 Starting Meme Alpha Mining with LoRD Regularization..." if self.use_lord else "🚀 Starting Meme Alpha Mining...")
+        if self.use_lord:
+            print(f"   LoRD Regularization enabled")
+            print(f"   Target keywords: ['q_proj', 'k_proj', 'attention', 'qk_norm']")
+        if self.update_mode == 'ppo':
+            print(f"   PPO update: {self.ppo_epochs} epochs x minibatch {self.ppo_minibatch}")
+        if self.world_size > 1:
+            print(f"   Data-parallel over {self.world_size} ranks (gloo)")
+        
+        self._train_loop(steps, batch_size, save, checkpoint_dir, checkpoint_every)
         
         print(f"\n✓ Training completed!")
         print(f"  Best score: {self.best_score:.4f}")
         print(f"  Best formula: {self.best_formula}")
+        print(f"  Archive: {len(self.archive)} diverse formulas")
+        if self.vm.op_stats is not None:
+            print(f"  VM time per op:")
+            print(self.vm.format_op_profile())
+
+    def _train_loop(self, steps, batch_size, save, checkpoint_dir, checkpoint_every):
+        steps = steps or ModelConfig.TRAIN_STEPS
+        bs = max(1, (batch_size or ModelConfig.BATCH_SIZE) // self.world_size)
+        ckpt = CheckpointManager(checkpoint_dir, keep=ModelConfig.CHECKPOINT_KEEP) if checkpoint_dir else None
+        every = checkpoint_every or ModelConfig.CHECKPOINT_EVERY
+        pbar = tqdm(range(self.start_step, steps), initial=self.start_step, total=steps, disable=not self.is_main)
+        pipe = ActorEvaluatorPipeline(self, bs, self.max_staleness, self.eval_workers) if self.pipeline else nullcontext()
+        
+        with pipe as pipe:
+            for step in pbar:
+                with self.step_profiler(step):
+                    self._train_step(step, steps, bs, pbar, ckpt, every, pipe)
+
+        if self.world_size > 1:
+            # 各 rank 的名人堂汇总到 rank 0
+            states = ddp.gather_objects(self.archive.state_dict())
+            if self.is_main:
+                for st in states[1:]:
+                    self.archive.merge(st)
+
+        if save:
+            # Save best formula
+            atomic_json_dump(self.best_formula, "best_meme_strategy.json")
+            
+            # Save training history
+            if self.vm.op_stats is not None:
+                self.training_history['vm_op_profile'] = self.vm.op_profile()
+            atomic_json_dump(self.training_history, "training_history.json")
+            
+            # Save diversity archive (read by StrategyRunner / tradingview_verifier)
+            self.archive.save()
+
+    def _train_step(self, step, steps, bs, pbar, ckpt, every, pipe):
+        stale = None
+        if pipe is not None:
+            # 取最早的一批已评估样本（由至多 max_staleness 步之前的策略采样）
+            stale, seqs, log_probs, rewards = pipe.next_batch()
+            # pi 在 eval 模式下重算（与 actor 的 mu 一致）；PPO 全程 eval，REINFORCE 仅梯度项切回 train
+            self.model.eval()
+            if self.update_mode == 'ppo':
+                self._update_ppo(seqs, log_probs, rewards)
+            else:
+                self._update_reinforce_offpolicy(seqs, log_probs, rewards)
+            with self.weights_lock:
+                pipe.updated()
+        elif self.update_mode == 'ppo':
+            # 采样阶段关闭 dropout，使旧策略的 log_prob 与重算时一致
+            self.model.eval()
+            seqs, log_probs = self._sample(bs, track_grad=False)
+            rewards = self._evaluate(seqs)
+            if self.world_size > 1:
+                self._sync_best()
+            self._update_ppo(seqs, log_probs, rewards)
+        else:
+            self.model.train()
+            seqs, log_probs = self._sample(bs, track_grad=True)
+            rewards = self._evaluate(seqs)
+            if self.world_size > 1:
+                self._sync_best()
+            self._update_reinforce(log_probs, rewards)
+        
+        # Logging
+        avg_reward = ddp.global_mean_std(rewards)[0] if self.world_size > 1 else rewards.mean().item()
+        postfix_dict = {'AvgRew': f"{avg_reward:.3f}", 'BestScore': f"{self.best_score:.3f}"}
+        if self.signal_cache is not None:
+            hit_rate = self.signal_cache.take_step_stats()
+            postfix_dict['Hit'] = f"{hit_rate:.0%}"
+            self.training_history.setdefault('cache_hit_rate', []).append(hit_rate)
+        if stale is not None:
+            postfix_dict['Stale'] = stale
+            self.training_history.setdefault('staleness', []).append(stale)
+        
+        if self.use_lord and step % 100 == 0:
+            with self.timer.phase('rank'):
+                stable_rank = self.rank_monitor.compute()
+            postfix_dict['Rank'] = f"{stable_rank:.2f}"
+            self.training_history['stable_rank'].append(stable_rank)
+        
+        self.training_history['step'].append(step)
+        self.training_history['avg_reward'].append(avg_reward)
+        self.training_history['best_score'].append(self.best_score)
+        self.training_history['evaluations'].append(self.evaluations)
+        
+        phase_seconds = self.timer.take()
+        postfix_dict['T'] = PhaseTimer.format(phase_seconds)
+        self.training_history.setdefault('phase_seconds', []).append(phase_seconds)
+        
+        pbar.set_postfix(postfix_dict)
+
+        self.start_step = step + 1
+        if ckpt and (self.start_step % every == 0 or self.start_step == steps):
+            with self.timer.phase('checkpoint'):
+                state = self.state_dict()
+                if self.is_main:
+                    ckpt.save(self.start_step, state)
+            # 写在本步记录之后，补进本步的耗时
+            phase_seconds.update(self.timer.take())
 
 
 if __name__ == "__main__":
-    eng = AlphaEngine(use_lord_regularization=True)
-    eng.train()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['reinforce', 'ppo'], default='reinforce')
+    parser.add_argument('--checkpoint-dir', type=str, default=ModelConfig.CHECKPOINT_DIR)
+    parser.add_argument('--resume', action='store_true', help="Continue from the latest checkpoint")
+    parser.add_argument('--warm-start', type=str, default=None, help="Checkpoint file/dir to take policy weights from")
+    parser.add_argument('--distributed', action='store_true', help="Data-parallel mode, launch with torchrun")
+    parser.add_argument('--pipeline', action='store_true', help="Overlap sampling, evaluation and updates")
+    parser.add_argument('--max-staleness', type=int, default=ModelConfig.PIPELINE_MAX_STALENESS)
+    parser.add_argument('--eval-workers', type=int, default=ModelConfig.PIPELINE_EVAL_WORKERS)
+    parser.add_argument('--compile', action='store_true', help="torch.compile the policy (TorchScript fallback)")
+    parser.add_argument('--no-signal-cache', action='store_true', help="Backtest every formula, even duplicates")
+    parser.add_argument('--cache-verify', action='store_true', help="Verify signal-cache hits by exact equality")
+    parser.add_argument('--folds', type=int, default=None, help="Time folds for fitness (0 = whole panel)")
+    parser.add_argument('--fold-scheme', choices=['blocks', 'expanding'], default=None)
+    parser.add_argument('--fold-agg', choices=['mean', 'min', 'median'], default=None)
+    parser.add_argument('--profile-ops', action='store_true', help="Per-op StackVM timing histogram")
+    parser.add_argument('--profile-steps', type=int, nargs='*', default=None, help="Steps to trace with torch.profiler")
+    parser.add_argument('--profile-dir', type=str, default='profiles')
+    args = parser.parse_args()
+    eng = AlphaEngine(use_lord_regularization=True, update_mode=args.mode,
+                      distributed=args.distributed or ddp.launched_by_torchrun(),
+                      pipeline=args.pipeline, max_staleness=args.max_staleness, eval_workers=args.eval_workers,
+                      compile_model=args.compile, signal_cache=not args.no_signal_cache,
+                      cache_verify=args.cache_verify, folds=args.folds, fold_scheme=args.fold_scheme,
+                      fold_agg=args.fold_agg, profile_ops=args.profile_ops,
+                      profile_steps=args.profile_steps, profile_dir=args.profile_dir)
+    if args.resume:
+        eng.resume(args.checkpoint_dir)
+    elif args.warm_start:
+        eng.warm_start(args.warm_start)
+    eng.train(checkpoint_dir=args.checkpoint_dir)
+    ddp.cleanup()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Low-Rank Decay (LoRD) and stable-rank monitoring, shared by AlphaEngine and
+lord/experiment.py (this module only depends on torch).
+
+Matrices of the same shape are stacked and orthogonalised together with batched
+Newton-Schulz iterations, one bmm per iteration per shape group instead of a
+Python loop over parameters. Stable rank ||W||_F^2 / ||W||_2^2 takes ||W||_2
+from a few power-iteration steps warm-started from the previous call's singular
+vector instead of a full SVD.
+"""
+from collections import defaultdict
+import torch
+
+
+def _matches(name, target_keywords):
+    return target_keywords is None or any(k in name for k in target_keywords)
+
+
+def _group_by_shape(params):
+    groups = defaultdict(list)
+    for name, p in params:
+        groups[(tuple(p.shape), p.device)].append((name, p))
+    return list(groups.values())
+
+
+@torch.no_grad()
+def newton_schulz(X, num_iterations=5):
+    """
+    Batched Newton-Schulz orthogonalisation of X [B, r, c]:
+    Y <- 1.5 Y - 0.5 (Y Y^T) Y, starting from X / ||X||_F.
+    Uses the Gram matrix of the smaller side, so it is identical to
+    0.5 * Y @ (3I - Y^T Y) but costs O(min(r, c)^2 * max(r, c)) per iteration.
+    """
+    Y = X.float()
+    Y = Y / (Y.flatten(1).norm(dim=1).view(-1, 1, 1) + 1e-8)
+    if Y.shape[1] <= Y.shape[2]:
+        for _ in range(num_iterations):
+            Y = torch.baddbmm(Y, torch.bmm(Y, Y.transpose(1, 2)), Y, beta=1.5, alpha=-0.5)
+    else:
+        for _ in range(num_iterations):
+            Y = torch.baddbmm(Y, Y, torch.bmm(Y.transpose(1, 2), Y), beta=1.5, alpha=-0.5)
+    return Y
+
+
+@torch.no_grad()
+def power_iteration(W, v, num_iterations):
+    """Largest singular value of each W [B, r, c], refining right vectors v [B, c] in place."""
+    for _ in range(num_iterations):
+        u = torch.bmm(W, v.unsqueeze(-1)).squeeze(-1)
+        u = u / (u.norm(dim=1, keepdim=True) + 1e-12)
+        v.copy_(torch.bmm(W.transpose(1, 2), u.unsqueeze(-1)).squeeze(-1))
+        v.div_(v.norm(dim=1, keepdim=True) + 1e-12)
+    return torch.bmm(W, v.unsqueeze(-1)).squeeze(-1).norm(dim=1)
+
+
+class NewtonSchulzLowRankDecay:
+    """
+    Low-Rank Decay (LoRD) using Newton-Schulz iteration.
+
+    A more efficient regularization method that targets low-rank structure
+    in attention and key parameters. Uses Newton-Schulz iteration to compute
+    the minimum singular vectors without explicit SVD.
+
+    Args:
+        named_parameters: Model's named parameters
+        decay_rate: Strength of low-rank decay
+        num_iterations: Number of Newton-Schulz iterations (default: 5)
+        target_keywords: If specified, only decay parameters matching these keywords
+            (None decays every matrix)
+        every: Apply the decay every k calls to step(), with k times the strength
+    """
+    def __init__(self, named_parameters, decay_rate=1e-3, num_iterations=5,
+                 target_keywords=("qk_norm", "attention"), every=1):
+        self.decay_rate = decay_rate
+        self.num_iterations = num_iterations
+        self.target_keywords = target_keywords
+        self.every = max(1, int(every))
+        self.num_steps = 0
+        self.params_to_decay = [
+            (name, param) for name, param in named_parameters
+            if param.requires_grad and param.ndim == 2 and _matches(name, target_keywords)
+        ]
+        self.groups = _group_by_shape(self.params_to_decay)
+
+    @torch.no_grad()
+    def step(self):
+        """Apply Newton-Schulz low-rank decay to attention parameters."""
+        self.num_steps += 1
+        if self.num_steps % self.every:
+            return
+        strength = self.decay_rate * self.every
+        for group in self.groups:
+            params = [p for _, p in group]
+            Y = newton_schulz(torch.stack(params), self.num_iterations)
+            for W, y in zip(params, Y):
+                W.sub_(strength * y.to(W.dtype))
+
+    def state_dict(self):
+        return {'decay_rate': self.decay_rate, 'num_iterations': self.num_iterations,
+                'every': self.every, 'num_steps': self.num_steps}
+
+    def load_state_dict(self, state):
+        self.decay_rate = state['decay_rate']
+        self.num_iterations = state['num_iterations']
+        self.every = state.get('every', self.every)
+        self.num_steps = state.get('num_steps', 0)
+
+
+class StableRankMonitor:
+    """
+    Monitor the effective rank (stable rank) of model parameters.
+
+    power_iters steps per call after a warmup_iters cold start; power_iters=0
+    uses exact singular values instead.
+    """
+    def __init__(self, model, target_keywords=("q_proj", "k_proj", "attention"),
+                 power_iters=5, warmup_iters=100):
+        self.model = model
+        self.target_keywords = target_keywords
+        self.power_iters = power_iters
+        self.warmup_iters = warmup_iters
+        self.history = []
+        self._vectors = {}  # group index -> right singular vectors [B, c]
+
+    @torch.no_grad()
+    def compute(self):
+        """Compute average stable rank of target parameters."""
+        params = [(name, p) for name, p in self.model.named_parameters()
+                  if p.ndim == 2 and _matches(name, self.target_keywords)]
+        ranks = []
+        for i, group in enumerate(_group_by_shape(params)):
+            W = torch.stack([p.detach().float() for _, p in group])
+            fro2 = W.square().sum(dim=(1, 2))
+            if self.power_iters <= 0:
+                sigma = torch.linalg.matrix_norm(W, ord=2)
+            else:
+                v = self._vectors.get(i)
+                iters = self.power_iters
+                if v is None or v.shape[0] != W.shape[0]:
+                    g = torch.Generator().manual_seed(i)
+                    v = torch.randn(W.shape[0], W.shape[2], generator=g).to(W.device)
+                    v /= v.norm(dim=1, keepdim=True)
+                    self._vectors[i] = v
+                    iters = self.warmup_iters
+                sigma = power_iteration(W, v, iters)
+            # Stable Rank = ||W||_F^2 / ||W||_2^2
+            ranks.extend((fro2 / (sigma ** 2 + 1e-9)).tolist())
+
+        avg_rank = sum(ranks) / len(ranks) if ranks else 0.0
+        self.history.append(avg_rank)
+        return avg_rank
+
+    def state_dict(self):
+        return {'history': list(self.history)}
+
+    def load_state_dict(self, state):
+        self.history = list(state['history'])
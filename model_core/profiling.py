@@ -0,0 +1,72 @@
+"""
+Step-level instrumentation for AlphaEngine.
+
+PhaseTimer accumulates wall-clock seconds per named phase within a training
+step (sample / vm / backtest / forward / backward / optim / lord / rank ...).
+Each phase is also a torch.profiler.record_function range, so phases show up as
+labelled blocks in the Chrome traces written by StepProfiler for chosen steps.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+import torch
+from torch.profiler import ProfilerActivity, profile, record_function
+
+
+class PhaseTimer:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._seconds = defaultdict(float)
+        self._lock = threading.Lock()  # evaluator threads time their own phases
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        with record_function(name):
+            try:
+                yield
+            finally:
+                dt = time.perf_counter() - t0
+                with self._lock:
+                    self._seconds[name] += dt
+
+    def take(self):
+        """Seconds per phase since the previous call, then reset."""
+        with self._lock:
+            out = {k: round(v, 4) for k, v in self._seconds.items()}
+            self._seconds.clear()
+        return out
+
+    @staticmethod
+    def format(seconds, top=4):
+        items = sorted(seconds.items(), key=lambda kv: -kv[1])[:top]
+        return ' '.join(f"{k}={v:.2f}" for k, v in items)
+
+
+class StepProfiler:
+    """torch.profiler over selected training steps, one Chrome trace file per step."""
+    def __init__(self, steps=(), out_dir='profiles'):
+        self.steps = set(steps or ())
+        self.out_dir = out_dir
+
+    def __call__(self, step):
+        if step not in self.steps:
+            return nullcontext()
+        return self._profile(step)
+
+    @contextmanager
+    def _profile(self, step):
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        with profile(activities=activities, record_shapes=True) as prof:
+            yield
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"step_{step:06d}.json")
+        prof.export_chrome_trace(path)
+        print(f"\n   Profiler trace for step {step} written to {path}")
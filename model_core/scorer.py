@@ -0,0 +1,151 @@
+"""
+Self-contained scorer artifact for live trading.
+
+The deployed formulas are traced into one straight-line TorchScript graph (no
+token loop, no op lookups) that maps the feature tensor [tokens, features, time]
+to the runner's score: the mean sigmoid of each formula's last-bar signal. The
+file carries a JSON header in its extra files:
+
+    {"format": "alphagpt-scorer", "version": 1, "formulas": [[...]], "input_dim": 6,
+     "features": [0, 2], "lookback": 2, ...}
+
+`features` are the feature rows the formulas read. `lookback` is how many past
+bars the last-bar score depends on (null if a formula uses JUMP, which
+normalises over the whole window); when it is finite the graph only reads the
+last lookback + 1 bars. Feature normalisation is per token over the loaded
+window (FeatureEngineer), so there are no frozen statistics to package.
+
+    python -m model_core.scorer --out strategy_scorer.pt --top 3
+
+Loading needs only torch: `load_scorer(path)` -> (module, header).
+"""
+import json
+import time
+import torch
+
+SCORER_FORMAT = "alphagpt-scorer"
+SCORER_VERSION = 1
+HEADER_FILE = "header.json"
+
+# token 对最后一根 K 线的额外回看长度
+_OP_LOOKBACK = {'DELAY1': 1, 'DECAY': 2, 'MAX3': 2}
+
+
+def formula_lookback(formula, feat_offset, op_names, arity):
+    """Bars of history the last value of a formula depends on; None if unbounded."""
+    stack = []
+    for token in formula:
+        if token < feat_offset:
+            stack.append(0)
+            continue
+        name = op_names[token]
+        args = [stack.pop() for _ in range(arity[token])]
+        if name == 'JUMP' or None in args:
+            stack.append(None)
+        else:
+            stack.append(max(args) + _OP_LOOKBACK.get(name, 0))
+    return stack[0]
+
+
+class _FormulaEnsemble(torch.nn.Module):
+    """Traced once; the VM dispatch below is unrolled into the graph."""
+    def __init__(self, formulas, vm, lookback):
+        super().__init__()
+        self.formulas = formulas
+        self.vm = vm
+        self.lookback = lookback
+
+    def forward(self, feat):
+        if self.lookback is not None:
+            feat = feat[:, :, -(self.lookback + 1):]
+        probs = []
+        for formula in self.formulas:
+            stack = []
+            for token in formula:
+                if token < self.vm.feat_offset:
+                    stack.append(feat[:, token, :])
+                    continue
+                args = [stack.pop() for _ in range(self.vm.arity_map[token])][::-1]
+                # VM 仅在出现 nan/inf 时替换；无条件替换结果相同且不依赖数据分支
+                res = self.vm.op_map[token](*args)
+                stack.append(torch.nan_to_num(res, nan=0.0, posinf=1.0, neginf=-1.0))
+            probs.append(torch.sigmoid(stack[0][:, -1]))
+        return torch.stack(probs).mean(dim=0)
+
+
+def export_scorer(formulas, path, feat_tensor, atol=1e-5):
+    """
+    Trace the formulas into a scorer file and check it against StackVM on
+    feat_tensor. Formulas the VM rejects are dropped. Returns the header.
+    """
+    from .vm import StackVM
+
+    vm = StackVM()
+    valid = [list(map(int, f)) for f in formulas if vm.execute(f, feat_tensor) is not None]
+    if not valid:
+        raise ValueError("No valid formula to export")
+    lookbacks = [formula_lookback(f, vm.feat_offset, vm.name_map, vm.arity_map) for f in valid]
+    lookback = None if None in lookbacks else max(lookbacks)
+
+    with torch.no_grad():
+        reference = torch.stack([torch.sigmoid(vm.execute(f, feat_tensor)[:, -1]) for f in valid]).mean(dim=0)
+        module = torch.jit.trace(_FormulaEnsemble(valid, vm, lookback), (feat_tensor,), check_trace=False)
+        out = module(feat_tensor)
+    err = (out - reference).abs().max().item()
+    if err > atol:
+        raise ValueError(f"Traced scorer deviates from StackVM by {err:.2e}")
+
+    header = {
+        "format": SCORER_FORMAT,
+        "version": SCORER_VERSION,
+        "formulas": valid,
+        "input_dim": vm.feat_offset,
+        "features": sorted({t for f in valid for t in f if t < vm.feat_offset}),
+        "lookback": lookback,
+        "output": "mean sigmoid of last-bar signal",
+        "torch": torch.__version__,
+        "created": int(time.time()),
+    }
+    torch.jit.save(module, path, _extra_files={HEADER_FILE: json.dumps(header)})
+    return header
+
+
+def load_scorer(path, map_location=None):
+    """(scorer module, header); raises ValueError for files of another format/version."""
+    extra = {HEADER_FILE: ""}
+    module = torch.jit.load(path, map_location=map_location, _extra_files=extra)
+    header = json.loads(extra[HEADER_FILE] or "{}")
+    if header.get("format") != SCORER_FORMAT or header.get("version") != SCORER_VERSION:
+        raise ValueError(f"{path} is not a version {SCORER_VERSION} scorer (header: {header.get('format')} "
+                         f"v{header.get('version')})")
+    module.eval()
+    return module, header
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from .config import ModelConfig
+    from .archive import load_formulas
+    from .synthetic import SyntheticDataLoader
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--strategy', type=str, default="best_meme_strategy.json")
+    parser.add_argument('--archive', type=str, default=ModelConfig.ARCHIVE_PATH)
+    parser.add_argument('--top', type=int, default=1, help="Ensemble the top N archived formulas")
+    parser.add_argument('--out', type=str, default="strategy_scorer.pt")
+    args = parser.parse_args()
+
+    if args.top > 1 and os.path.exists(args.archive):
+        formulas = load_formulas(args.archive, top=args.top)
+    else:
+        with open(args.strategy, "r") as f:
+            data = json.load(f)
+        formulas = [data if isinstance(data, list) else data.get("formula")]
+
+    # 校验数据：合成行情即可，不依赖数据库
+    loader = SyntheticDataLoader(n_tokens=64, n_bars=500)
+    loader.load_data()
+    header = export_scorer(formulas, args.out, loader.feat_tensor)
+    print(f"Scorer written to {args.out}: {len(header['formulas'])} formula(s), "
+          f"features {header['features']}, lookback {header['lookback']}")
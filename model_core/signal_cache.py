@@ -0,0 +1,87 @@
+"""
+Backtest-result cache keyed by a fingerprint of the VM output.
+
+Different token sequences often compute the same signal (ABS of a non-negative
+feature, SIGN collapsing, GATE picking one branch...). The key hashes the
+signal's shape, float16-quantised values at a fixed sample of positions and its
+summary moments, so equal signals hit without hashing the whole [tokens, time]
+tensor. With verify=True the full signal is kept per entry and every hit is
+checked for exact equality (mismatches are counted as collisions and re-scored).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import torch
+from .config import ModelConfig
+
+
+class SignalCache:
+    def __init__(self, capacity=None, sample=None, verify=False, seed=0):
+        self.capacity = capacity or ModelConfig.SIGNAL_CACHE_SIZE
+        self.sample = sample or ModelConfig.SIGNAL_CACHE_SAMPLE
+        self.verify = verify
+        self.seed = seed
+        self._positions = {}  # shape -> sampled flat indices
+        self._entries = OrderedDict()  # key -> (result, signal or None), LRU order
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.collisions = 0
+        self._step_hits = self._step_lookups = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _sample_positions(self, signal):
+        shape = tuple(signal.shape)
+        pos = self._positions.get(shape)
+        if pos is None:
+            n = signal.numel()
+            g = torch.Generator().manual_seed(self.seed)
+            pos = torch.randperm(n, generator=g)[:min(self.sample, n)].to(signal.device)
+            self._positions[shape] = pos
+        return pos
+
+    def key(self, signal):
+        flat = signal.reshape(-1)
+        sample = flat[self._sample_positions(signal)].to(torch.float16)
+        moments = torch.stack([flat.mean(), flat.std(), flat.min(), flat.max()]).to(torch.float32)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(tuple(signal.shape)).encode())
+        h.update(sample.cpu().numpy().tobytes())
+        h.update(moments.cpu().numpy().tobytes())
+        return h.digest()
+
+    def get(self, signal):
+        """(key, cached result or None). Pass the key back to put() on a miss."""
+        key = self.key(signal)
+        with self._lock:
+            self._step_lookups += 1
+            entry = self._entries.get(key)
+            if entry is not None and self.verify and not torch.equal(entry[1], signal):
+                self.collisions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return key, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._step_hits += 1
+            return key, entry[0]
+
+    def put(self, key, result, signal=None):
+        with self._lock:
+            self._entries[key] = (result, signal.clone() if self.verify else None)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def take_step_stats(self):
+        """Hit rate since the previous call (one training step), then reset."""
+        with self._lock:
+            rate = self._step_hits / self._step_lookups if self._step_lookups else 0.0
+            self._step_hits = self._step_lookups = 0
+        return rate
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._positions.clear()
@@ -0,0 +1,75 @@
+import torch
+from .config import ModelConfig
+from .data_loader import CryptoDataLoader
+
+
+def generate_market(n_tokens=64, n_bars=2000, seed=0, device=None):
+    """
+    Synthetic meme-coin OHLCV + liquidity panel, all tensors [tokens, bars].
+
+    Log-price = diffusion with per-token volatility + pump jumps that decay back
+    (mean-reverting jump component) + rare rug pulls. Volume spikes with |return|,
+    liquidity drifts with price and collapses on rugs, fdv = price * supply.
+    """
+    device = device or ModelConfig.DEVICE
+    g = torch.Generator().manual_seed(seed)
+
+    def rand(*shape):
+        return torch.rand(shape, generator=g)
+
+    def randn(*shape):
+        return torch.randn(shape, generator=g)
+
+    N, T = n_tokens, n_bars
+    sigma = 0.005 + 0.025 * rand(N, 1)
+    diffusion = sigma * randn(N, T)
+
+    # Pump: 跳涨后按指数衰减回吐
+    pump_hit = (rand(N, T) < 0.002).float()
+    pump_size = (0.3 + 0.15 * randn(N, T)).clamp(min=0.05) * pump_hit
+    decay = 0.97
+    jump = torch.zeros(N, T)
+    level = torch.zeros(N)
+    for t in range(T):
+        level = level * decay + pump_size[:, t]
+        jump[:, t] = level
+
+    # Rug: 小概率一次性暴跌，之后不再恢复
+    rug_hit = (rand(N, T) < 0.0002).float()
+    rug = torch.cumsum(rug_hit * -(0.5 + 0.4 * rand(N, T)), dim=1)
+
+    log_p = torch.log(1e-4 + 1e-2 * rand(N, 1)) + torch.cumsum(diffusion, dim=1) + jump + rug
+    close = torch.exp(log_p)
+    open_ = torch.cat([close[:, :1], close[:, :-1]], dim=1)
+    wick = sigma * rand(N, T).abs()
+    high = torch.maximum(open_, close) * (1 + wick)
+    low = torch.minimum(open_, close) * (1 - wick)
+
+    ret = torch.diff(log_p, dim=1, prepend=log_p[:, :1])
+    base_vol = torch.exp(8 + randn(N, 1))
+    volume = base_vol * torch.exp(0.5 * randn(N, T)) * (1 + 20 * ret.abs() / sigma.clamp(min=1e-6) ** 0.5)
+
+    base_liq = torch.exp(torch.log(torch.tensor(8e5)) + 0.8 * randn(N, 1))
+    liquidity = base_liq * torch.exp(0.5 * (log_p - log_p[:, :1]) + rug)
+    supply = 1e9 * (1 + 9 * rand(N, 1))
+    fdv = close * supply
+
+    raw = {'open': open_, 'high': high, 'low': low, 'close': close,
+           'volume': volume, 'liquidity': liquidity, 'fdv': fdv}
+    return {k: v.float().to(device) for k, v in raw.items()}
+
+
+class SyntheticDataLoader(CryptoDataLoader):
+    """Drop-in CryptoDataLoader backed by generate_market instead of Postgres."""
+    def __init__(self, n_tokens=64, n_bars=2000, seed=0):
+        self.engine = None
+        self.feat_tensor = None
+        self.raw_data_cache = None
+        self.target_ret = None
+        self.n_tokens = n_tokens
+        self.n_bars = n_bars
+        self.seed = seed
+
+    def load_data(self, limit_tokens=None):
+        n = min(self.n_tokens, limit_tokens) if limit_tokens else self.n_tokens
+        self._build_tensors(generate_market(n, self.n_bars, self.seed))
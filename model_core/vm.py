@@ -1,3 +1,5 @@
+import threading
+import time
 import torch
 from .ops import OPS_CONFIG
 from .factors import FeatureEngineer
@@ -7,6 +9,35 @@ class StackVM:
         self.feat_offset = FeatureEngineer.INPUT_DIM
         self.op_map = {i + self.feat_offset: cfg[1] for i, cfg in enumerate(OPS_CONFIG)}
         self.arity_map = {i + self.feat_offset: cfg[2] for i, cfg in enumerate(OPS_CONFIG)}
+        self.name_map = {i + self.feat_offset: cfg[0] for i, cfg in enumerate(OPS_CONFIG)}
+        self.op_stats = None  # name -> [calls, seconds] when op profiling is on
+        self._stats_lock = threading.Lock()
+
+    def enable_op_profile(self):
+        self.op_stats = {cfg[0]: [0, 0.0] for cfg in OPS_CONFIG}
+
+    def op_profile(self):
+        """Per-op call count, total and mean time, slowest total first."""
+        if self.op_stats is None:
+            return {}
+        rows = sorted(self.op_stats.items(), key=lambda kv: -kv[1][1])
+        return {name: {'calls': n, 'total_s': round(t, 4), 'mean_us': round(t / n * 1e6, 1) if n else 0.0}
+                for name, (n, t) in rows}
+
+    def format_op_profile(self, width=30):
+        prof = self.op_profile()
+        total = sum(r['total_s'] for r in prof.values()) or 1.0
+        lines = []
+        for name, r in prof.items():
+            if not r['calls']:
+                continue
+            bar = '#' * int(round(width * r['total_s'] / total))
+            lines.append(f"  {name:7s} {r['total_s']:9.3f}s {r['calls']:9d} calls {r['mean_us']:9.1f}us |{bar}")
+        return '\n'.join(lines)
+
+    def stream(self, formula):
+        """FormulaStream for bar-by-bar evaluation; raises ValueError if not streamable."""
+        return FormulaStream(self, formula)
 
     def execute(self, formula_tokens, feat_tensor):
         stack = []
@@ -23,7 +54,16 @@ class StackVM:
                         args.append(stack.pop())
                     args.reverse()
                     func = self.op_map[token]
-                    res = func(*args)
+                    if self.op_stats is None:
+                        res = func(*args)
+                    else:
+                        t0 = time.perf_counter()
+                        res = func(*args)
+                        dt = time.perf_counter() - t0
+                        with self._stats_lock:
+                            stat = self.op_stats[self.name_map[token]]
+                            stat[0] += 1
+                            stat[1] += dt
                     if torch.isnan(res).any() or torch.isinf(res).any():
                         res = torch.nan_to_num(res, nan=0.0, posinf=1.0, neginf=-1.0)
                     stack.append(res)
@@ -34,4 +74,145 @@ class StackVM:
             else:
                 return None
         except Exception:
-            return None
\ No newline at end of file
+            return None
+
+# 时序算子需要的历史长度 (对应 ops 中的 _ts_delay)
+_STREAM_DELAY = {'DELAY1': 1, 'DECAY': 2, 'MAX3': 2}
+
+
+class FormulaStream:
+    """
+    Incremental evaluation of one formula for all tokens, one bar at a time.
+
+    Every node of the formula keeps a short buffer of its latest values (as many
+    as the time ops above it read), so a new bar costs O(tokens x ops) whatever
+    the history length. JUMP keeps per-token running mean/std (Welford) of its
+    input and re-normalises its buffered inputs, which reproduces the batch VM's
+    whole-series statistics at the latest bar. A JUMP below another JUMP would
+    need its whole output history rewritten each bar and is rejected.
+
+    The value returned by step() for the latest bar matches
+    StackVM.execute(formula, feat)[:, -1] on the same history.
+    """
+    def __init__(self, vm, formula):
+        self.vm = vm
+        nodes, stack = [], []
+        for token in map(int, formula):
+            if token < vm.feat_offset:
+                nodes.append((None, token, ()))
+            elif token in vm.op_map:
+                arity = vm.arity_map[token]
+                if len(stack) < arity:
+                    raise ValueError(f"Invalid formula {formula}")
+                args = tuple(stack[-arity:])
+                del stack[-arity:]
+                if vm.name_map[token] == 'JUMP' and self._has_jump(nodes, args[0]):
+                    raise ValueError("Nested JUMP cannot be streamed")
+                nodes.append((vm.name_map[token], token, args))
+            else:
+                raise ValueError(f"Unknown token {token}")
+            stack.append(len(nodes) - 1)
+        if len(stack) != 1:
+            raise ValueError(f"Invalid formula {formula}")
+        self.nodes = nodes
+
+        # 每个节点需要保留的历史长度，从根往叶子传播
+        need = [0] * len(nodes)
+        for i in reversed(range(len(nodes))):
+            name, _, args = nodes[i]
+            for a in args:
+                need[a] = max(need[a], need[i] + _STREAM_DELAY.get(name, 0))
+        self.width = [n + 1 for n in need]
+        self.jump_inputs = {args[0] for name, _, args in nodes if name == 'JUMP'}
+        # JUMP 及其上游节点的旧值会随统计量变化，每根 K 线整窗重算
+        self.dirty = []
+        for name, _, args in nodes:
+            self.dirty.append(name == 'JUMP' or any(self.dirty[a] for a in args))
+        self.reset(0)
+
+    def _has_jump(self, nodes, i):
+        name, _, args = nodes[i]
+        return name == 'JUMP' or any(self._has_jump(nodes, a) for a in args)
+
+    def reset(self, n_tokens, device=None):
+        self.t = 0
+        self.bufs = [torch.zeros(n_tokens, w, device=device) for w in self.width]
+        # Welford: 每个 JUMP 输入的逐 token 均值与 M2 (float64)
+        self.stats = {i: (torch.zeros(n_tokens, dtype=torch.float64, device=device),
+                          torch.zeros(n_tokens, dtype=torch.float64, device=device)) for i in self.jump_inputs}
+
+    def _push(self, i, col):
+        buf = self.bufs[i]
+        self.bufs[i] = torch.cat([buf[:, 1:], col], dim=1) if buf.shape[1] > 1 else col
+        if i in self.stats:
+            mean, m2 = self.stats[i]
+            x = col[:, 0].double()
+            delta = x - mean
+            mean = mean + delta / (self.t + 1)
+            self.stats[i] = (mean, m2 + delta * (x - mean))
+
+    def _jump(self, i, child):
+        w = self.width[i]
+        mean, m2 = self.stats[child]
+        std = (m2 / self.t).sqrt().float().unsqueeze(1) + 1e-6  # t = bars - 1 (unbiased)
+        z = (self.bufs[child][:, -w:] - mean.float().unsqueeze(1)) / std
+        return torch.relu(z - 3.0)
+
+    def _window(self, i, name, token, args):
+        w = self.width[i]
+        if name == 'JUMP':
+            out = self._jump(i, args[0])
+        elif name in _STREAM_DELAY:
+            out = self.vm.op_map[token](self.bufs[args[0]])[:, -w:]
+        else:
+            out = self.vm.op_map[token](*[self.bufs[a][:, -w:] for a in args])
+        if self.t + 1 < w:
+            out[:, :w - self.t - 1] = 0.0  # 早于首根 K 线的位置按 VM 的零填充处理
+        return out
+
+    @torch.no_grad()
+    def step(self, feat_col):
+        """Advance by one bar; feat_col is [tokens, features]. Returns the signal [tokens]."""
+        if self.bufs[0].shape[0] != feat_col.shape[0]:
+            self.reset(feat_col.shape[0], feat_col.device)
+        for i, (name, token, args) in enumerate(self.nodes):
+            if name is None:
+                self._push(i, feat_col[:, token:token + 1])
+            elif self.dirty[i]:
+                self.bufs[i] = torch.nan_to_num(self._window(i, name, token, args), nan=0.0, posinf=1.0, neginf=-1.0)
+            else:
+                if name in _STREAM_DELAY:
+                    res = self.vm.op_map[token](self.bufs[args[0]])[:, -1:]
+                else:
+                    res = self.vm.op_map[token](*[self.bufs[a][:, -1:] for a in args])
+                self._push(i, torch.nan_to_num(res, nan=0.0, posinf=1.0, neginf=-1.0))
+        self.t += 1
+        return self.bufs[-1][:, -1]
+
+    @torch.no_grad()
+    def prime(self, feat_tensor):
+        """
+        Load a [tokens, features, time] history in one vectorised pass over the
+        whole panel (same ops as StackVM.execute); returns the latest signal.
+        """
+        n, _, T = feat_tensor.shape
+        self.reset(n, feat_tensor.device)
+        outs = []
+        for i, (name, token, args) in enumerate(self.nodes):
+            if name is None:
+                out = feat_tensor[:, token, :]
+            else:
+                res = self.vm.op_map[token](*[outs[a] for a in args])
+                out = torch.nan_to_num(res, nan=0.0, posinf=1.0, neginf=-1.0)
+            outs.append(out)
+            w = self.width[i]
+            buf = out[:, -w:]
+            if buf.shape[1] < w:
+                buf = torch.cat([torch.zeros(n, w - buf.shape[1], device=buf.device), buf], dim=1)
+            self.bufs[i] = buf.float().clone()
+            if i in self.stats:
+                x = out.double()
+                mean = x.mean(dim=1)
+                self.stats[i] = (mean, (x - mean.unsqueeze(1)).square().sum(dim=1))
+        self.t = T
+        return self.bufs[-1][:, -1]
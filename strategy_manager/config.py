@@ -7,4 +7,10 @@ class StrategyConfig:
     TRAILING_ACTIVATION = 0.05
     TRAILING_DROP = 0.03
     BUY_THRESHOLD = 0.85
-    SELL_THRESHOLD = 0.45
\ No newline at end of file
+    SELL_THRESHOLD = 0.45
+    ENSEMBLE_SIZE = 1 # >1 时从 alpha_archive.json 取前 N 个公式集成
+    SCORER_PATH = "strategy_scorer.pt" # 存在时用导出的 TorchScript 打分器代替 StackVM
+    STREAMING = True # 只对新到的 K 线增量计算公式，而不是每轮重跑全部历史
+    STREAM_REPRIME_BARS = 240 # 增量推进这么多根后按最新特征重放一次 (特征归一化窗口在移动)
+    MONITOR_CONCURRENCY = 8 # 同时检查的持仓数上限
+    PRICE_TIMEOUT = 10.0 # 单次询价超时 (秒)，超时的持仓本轮跳过
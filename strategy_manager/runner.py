@@ -1,4 +1,5 @@
 import asyncio
+import os
 import torch
 import json
 import time
@@ -8,8 +9,10 @@ import pandas as pd
 from data_pipeline.data_manager import DataManager
 from model_core.vm import StackVM
 from model_core.data_loader import CryptoDataLoader
+from model_core.archive import load_formulas
+from model_core.scorer import load_scorer
+from model_core.config import ModelConfig
 from execution.trader import SolanaTrader
-from execution.utils import get_mint_decimals
 from .config import StrategyConfig
 from .portfolio import PortfolioManager
 from .risk import RiskEngine
@@ -25,7 +28,23 @@ class StrategyRunner:
         self.loader = CryptoDataLoader()
         self.token_map = {} # {address: tensor_index} 用于快速查找特征
         self.last_scan_time = 0
+        self.streams = None # 每个公式一个 FormulaStream，首次打分时创建
+        self._stream_state = None # (token 地址, 已消费的 K 线数, 上次重放后推进的根数)
+        self._stream_scores = None
+        self._monitor_sem = asyncio.Semaphore(StrategyConfig.MONITOR_CONCURRENCY)
+        self._token_locks = {} # {address: asyncio.Lock}
         
+        # 导出的打分器：公式已展开成静态图，加载后直接对全部 token 打分
+        self.scorer = None
+        if os.path.exists(StrategyConfig.SCORER_PATH):
+            t0 = time.perf_counter()
+            self.scorer, header = load_scorer(StrategyConfig.SCORER_PATH, map_location=ModelConfig.DEVICE)
+            self.formulas = header["formulas"]
+            self.formula = self.formulas[0]
+            logger.success(f"Loaded scorer {StrategyConfig.SCORER_PATH} ({len(self.formulas)} formulas, "
+                           f"lookback {header['lookback']}) in {(time.perf_counter() - t0) * 1e3:.1f}ms")
+            return
+
         try:
             with open("best_meme_strategy.json", "r") as f:
                 # 兼容早期版本
@@ -36,10 +55,17 @@ class StrategyRunner:
             logger.critical("Strategy file not found! Please train model first.")
             exit(1)
 
+        # 多因子集成：从名人堂取前 N 个去相关公式，信号取 sigmoid 均值
+        self.formulas = [self.formula]
+        if StrategyConfig.ENSEMBLE_SIZE > 1 and os.path.exists(ModelConfig.ARCHIVE_PATH):
+            self.formulas = load_formulas(ModelConfig.ARCHIVE_PATH, top=StrategyConfig.ENSEMBLE_SIZE) or self.formulas
+            logger.success(f"Loaded ensemble of {len(self.formulas)} archived formulas")
+
     async def initialize(self):
         await self.data_mgr.initialize()
         bal = await self.trader.rpc.get_balance()
         logger.info(f"Bot Initialized. Wallet Balance: {bal:.4f} SOL")
+        await self.trader.mints.warm(self.portfolio.positions)
 
     async def run_loop(self):
         logger.info(">_< | Strategy Runner Started (Live Mode)")
@@ -84,6 +110,8 @@ class StrategyRunner:
         addresses = df['address'].tolist()
         
         self.token_map = {addr: idx for idx, addr in enumerate(addresses)}
+        # 精度只需查一次：新出现的 token 批量预取，之后询价/下单都走缓存
+        await self.trader.mints.warm(addresses)
         logger.info(f"Mapped {len(self.token_map)} tokens for inference.")
 
     async def monitor_positions(self):
@@ -91,11 +119,37 @@ class StrategyRunner:
 
         logger.info(f"o.O | Monitoring {len(self.portfolio.positions)} positions...")
         
-        for token_addr, pos in list(self.portfolio.positions.items()):
-            current_price = await self._fetch_live_price_sol(token_addr)
-            if current_price <= 0:
-                logger.warning(f"Could not fetch price for {pos.symbol}, skipping.")
-                continue
+        # 各持仓并发询价/风控，慢的报价不再拖住其它持仓的止损
+        positions = list(self.portfolio.positions.items())
+        results = await asyncio.gather(
+            *(self._monitor_position(token_addr, pos) for token_addr, pos in positions),
+            return_exceptions=True
+        )
+        for (token_addr, pos), res in zip(positions, results):
+            if isinstance(res, Exception):
+                logger.error(f"Monitor failed for {pos.symbol}: {res!r}")
+
+    def _token_lock(self, token_addr):
+        """Per-token lock: trades and position updates for one token never interleave."""
+        return self._token_locks.setdefault(token_addr, asyncio.Lock())
+
+    async def _monitor_position(self, token_addr, pos):
+        async with self._monitor_sem:
+            try:
+                current_price = await asyncio.wait_for(
+                    self._fetch_live_price_sol(token_addr), timeout=StrategyConfig.PRICE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Price fetch timed out for {pos.symbol}, skipping.")
+                return
+        if current_price <= 0:
+            logger.warning(f"Could not fetch price for {pos.symbol}, skipping.")
+            return
+
+        async with self._token_lock(token_addr):
+            # 等锁期间持仓可能已被平掉
+            if self.portfolio.positions.get(token_addr) is not pos:
+                return
 
             self.portfolio.update_price(token_addr, current_price)
             
@@ -104,14 +158,14 @@ class StrategyRunner:
             if pnl_pct <= StrategyConfig.STOP_LOSS_PCT:
                 logger.warning(f"!!! | STOP LOSS: {pos.symbol} PnL: {pnl_pct:.2%}")
                 await self._execute_sell(token_addr, 1.0, "StopLoss")
-                continue
+                return
 
             if not pos.is_moonbag and pnl_pct >= StrategyConfig.TAKE_PROFIT_Target1:
                 logger.success(f"😄 | MOONBAG TP: {pos.symbol} PnL: {pnl_pct:.2%}")
                 await self._execute_sell(token_addr, StrategyConfig.TP_Target1_Ratio, "Moonbag")
                 pos.is_moonbag = True
                 self.portfolio.save_state()
-                continue
+                return
 
             max_gain = (pos.highest_price - pos.entry_price) / pos.entry_price
             drawdown = (pos.highest_price - current_price) / pos.highest_price
@@ -119,7 +173,7 @@ class StrategyRunner:
             if max_gain > StrategyConfig.TRAILING_ACTIVATION and drawdown > StrategyConfig.TRAILING_DROP:
                 logger.warning(f"😠 | TRAILING STOP: {pos.symbol} Max: {max_gain:.2%} DD: {drawdown:.2%}")
                 await self._execute_sell(token_addr, 1.0, "TrailingStop")
-                continue
+                return
 
             if not pos.is_moonbag:
                 ai_score = await self._run_inference(token_addr)
@@ -127,13 +181,61 @@ class StrategyRunner:
                     logger.info(f"🤖 | AI EXIT: {pos.symbol} Score: {ai_score:.2f}")
                     await self._execute_sell(token_addr, 1.0, "AI_Signal")
 
+    def _ensemble_scores(self, features):
+        """Mean sigmoid of the latest signal over all valid formulas: [tokens], or None."""
+        if self.scorer is not None:
+            with torch.no_grad():
+                return self.scorer(features)
+        probs = []
+        for formula in self.formulas:
+            res = self.vm.execute(formula, features)
+            if res is not None:
+                probs.append(torch.sigmoid(res[:, -1]))
+        if not probs:
+            return None
+        return torch.stack(probs).mean(dim=0)
+
+    def _latest_scores(self):
+        """
+        Ensemble score of the newest bar for every loaded token: [tokens], or None.
+        A loaded scorer artifact always takes precedence. Otherwise, with
+        StrategyConfig.STREAMING the formulas only advance over bars that arrived
+        since the previous call; the state is re-primed from the full history when
+        the token set changes, the panel shrinks, or every STREAM_REPRIME_BARS bars.
+        """
+        feat = self.loader.feat_tensor
+        if self.scorer is not None or not StrategyConfig.STREAMING:
+            return self._ensemble_scores(feat)
+        if self.streams is None:
+            try:
+                self.streams = [self.vm.stream(f) for f in self.formulas if self.vm.execute(f, feat) is not None]
+            except ValueError as e:
+                logger.warning(f"Streaming disabled: {e}")
+                self.streams = []
+        if not self.streams:
+            return self._ensemble_scores(feat)
+
+        tokens, bars = frozenset(self.token_map), feat.shape[2]
+        state = self._stream_state
+        if state is None or state[0] != tokens or bars < state[1] or state[2] >= StrategyConfig.STREAM_REPRIME_BARS \
+                or self.streams[0].bufs[0].shape[0] != feat.shape[0]:
+            signals = [s.prime(feat) for s in self.streams]
+            self._stream_state = (tokens, bars, 0)
+        elif bars > state[1]:
+            for t in range(state[1], bars):
+                signals = [s.step(feat[:, :, t]) for s in self.streams]
+            self._stream_state = (tokens, bars, state[2] + bars - state[1])
+        else:
+            return self._stream_scores
+        self._stream_scores = torch.stack([torch.sigmoid(x) for x in signals]).mean(dim=0)
+        return self._stream_scores
+
     async def scan_for_entries(self):
-        raw_signals = self.vm.execute(self.formula, self.loader.feat_tensor)
+        ensemble = self._latest_scores()
         
-        if raw_signals is None: return
+        if ensemble is None: return
 
-        latest_signals = raw_signals[:, -1]
-        scores = torch.sigmoid(latest_signals).cpu().numpy() # 转为概率 0~1
+        scores = ensemble.cpu().numpy() # 转为概率 0~1
         
         # 翻转排序，从高分到低分处理
         sorted_indices = scores.argsort()[::-1]
@@ -162,7 +264,8 @@ class StrategyRunner:
             
             is_safe = await self.risk.check_safety(token_addr, liq_usd)
             if is_safe:
-                await self._execute_buy(token_addr, score)
+                async with self._token_lock(token_addr):
+                    await self._execute_buy(token_addr, score)
                 
                 # 检查仓位上限
                 if self.portfolio.get_open_count() >= StrategyConfig.MAX_OPEN_POSITIONS:
@@ -197,7 +300,7 @@ class StrategyRunner:
             # 为了防止连续重复下单
             expected_out = int(quote['outAmount'])
             
-            decimals = await get_mint_decimals(token_addr, self.trader.rpc.client)
+            decimals = await self.trader.mints.decimals(token_addr)
             token_amount_ui = expected_out / (10 ** decimals)
             
             entry_price_sol = amount_sol / token_amount_ui if token_amount_ui > 0 else 0
@@ -212,6 +315,7 @@ class StrategyRunner:
             logger.success(f"+ | Position Added: {token_amount_ui:.2f} units @ {entry_price_sol:.6f} SOL")
 
     async def _execute_sell(self, token_addr, ratio, reason):
+        # 调用方需持有 self._token_lock(token_addr)；卖单不设超时，以免交易已上链而账本未更新
         pos = self.portfolio.positions.get(token_addr)
         if not pos: return
 
@@ -234,22 +338,16 @@ class StrategyRunner:
         if idx is None:
             return -1
 
-        features = self.loader.feat_tensor[idx] # 此时是 2D Tensor
-        
-        features_batch = features.unsqueeze(0) # [1, F, T]
-        
-        res = self.vm.execute(self.formula, features_batch) # -> [1, Time]
+        scores = self._latest_scores() # [Tokens]，无新 K 线时直接复用
         
-        if res is None: return -1
+        if scores is None: return -1
         
-        latest_logit = res[0, -1]
-        score = torch.sigmoid(latest_logit).item()
-        return score
+        return scores[idx].item()
 
     async def _fetch_live_price_sol(self, token_addr):
         try:
             # 1. 获取精度
-            decimals = await get_mint_decimals(token_addr, self.trader.rpc.client)
+            decimals = await self.trader.mints.decimals(token_addr)
             amount_1_unit = 10 ** decimals
             
             # 2. 询价: 1 Token -> ? SOL
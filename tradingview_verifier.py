@@ -108,5 +108,26 @@ def export_best_strategy(input_file="best_meme_strategy.json", output_file="stra
     
     print(f"✓ Pine Script exported to {output_file}")
 
+def export_archive(input_file="alpha_archive.json", output_dir="pine", top=None):
+    """Export every formula of the diversity archive (best first) as strategy_<rank>.pine."""
+    if not os.path.exists(input_file):
+        print(f"Error: {input_file} not found.")
+        return
+    
+    with open(input_file, "r") as f:
+        members = json.load(f).get("members", [])
+    members = sorted(members, key=lambda m: m["score"], reverse=True)[:top]
+    
+    os.makedirs(output_dir, exist_ok=True)
+    exporter = TradingViewExporter()
+    for rank, member in enumerate(members, 1):
+        pine = exporter.to_pine(member["formula"], strategy_name=f"Alpha_Engine_Yang_Archive_{rank}")
+        with open(os.path.join(output_dir, f"strategy_{rank}.pine"), "w") as f:
+            f.write(pine)
+    
+    print(f"✓ {len(members)} archived strategies exported to {output_dir}/")
+
 if __name__ == "__main__":
     export_best_strategy()
+    if os.path.exists("alpha_archive.json"):
+        export_archive()